@@ -0,0 +1,190 @@
+# bench/bench.py
+# Offline benchmark parserů a celé cesty stažení -> CSV nad bench/fixtures (bez STIS).
+#   python bench/bench.py [--fetch http|auto|browser] [--repeat N] [--latency MS] [--json soubor]
+#
+# 1) parser: html_table_rows + parse_table / parse_page_rows nad statickými stránkami, řádky/s
+# 2) export: lokální HTTP server místo STIS (STIS_BASE), pro každou stránku z manifest.json
+#    export_svaz / export_zebricek, požadavky na server (round trips), volání Playwrightu
+#    (playwright_calls z METRICS – IPC s prohlížečem, serverem neviditelné), bajty a čas;
+#    výstup se porovná s fixtures/expected/*.csv – regresní kontrola parserů
+# 3) součet času po svazech (stránkovaná varianta "<svaz>-str" se počítá ke svazu)
+# V --json je u každého exportu i rozpad na fáze a čítače z METRICS (jako run_report.json).
+#
+# Běží v dočasném adresáři (data/, stav i session mimo repozitář), RATE_MS=0 pokud není
+# zadáno jinak. Stránkované žebříčky potřebují prohlížeč – s FETCH=http se přeskočí.
+
+import os, sys, csv, json, time, shutil, argparse, tempfile, threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(ROOT)
+FIXTURES = os.path.join(ROOT, "fixtures")
+
+class Handler(BaseHTTPRequestHandler):
+    """stránky z fixtures/<cesta>/index.html, bez přesměrování; počítá požadavky a bajty"""
+
+    def do_GET(self):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+        path = os.path.normpath(urlsplit(self.path).path.strip("/") or ".")
+        full = os.path.join(FIXTURES, path, "index.html")
+        if path.startswith("..") or not os.path.isfile(full):
+            self.send_error(404)
+            return
+        with open(full, "rb") as f:
+            body = f.read()
+        with srv.lock:
+            srv.hits += 1
+            srv.bytes += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if path == ".":
+            self.send_header("Set-Cookie", "PHPSESSID=bench; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *a):
+        pass
+
+def start_server(latency_ms):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.latency = latency_ms / 1000.0
+    srv.lock = threading.Lock()
+    srv.hits = srv.bytes = 0
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f, delimiter=";"))
+
+def label(c):
+    return f"{c['dataset']} {c['svaz']}" + (f" kat-{c['kat']}" if c.get("kat") else "")
+
+def bench_parsers(cases, repeat):
+    import lxml.html
+    import scrape_soupisky, scrape_zebricek
+    from stis_common import html_find_class, html_table_rows
+    out = []
+    for c in cases:
+        if c.get("paginated"):
+            continue
+        d = os.path.join(FIXTURES, urlpath(c).strip("/"), "index.html")
+        with open(d, "rb") as f:
+            raw_html = f.read()
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            doc = lxml.html.fromstring(raw_html, parser=lxml.html.HTMLParser(encoding="utf-8"))
+            if c["dataset"] == "soupisky":
+                rows = scrape_soupisky.parse_table(html_table_rows(html_find_class(doc, "table", "soupisky")))
+            else:
+                rows = scrape_zebricek.parse_page_rows(scrape_zebricek.doc_table_rows(doc),
+                                                       c["svaz"], c["kat"], c["rocnik"])
+        t = (time.perf_counter() - t0) / repeat
+        out.append({"case": label(c), "rows": len(rows), "ms": round(t * 1000, 2),
+                    "rows_per_s": round(len(rows) / t) if t else None})
+    return out
+
+def urlpath(c):
+    if c["dataset"] == "soupisky":
+        return f"/soupisky/svaz-{c['svaz']}/rocnik-{c['rocnik']}"
+    return f"/zebricekstr-oblast/svaz-{c['svaz']}/rocnik-{c['rocnik']}/kategorie-{c['kat']}/zvyssich-{c['zvyss']}"
+
+def bench_exports(cases, srv):
+    import stis, scrape_soupisky, scrape_zebricek
+    from stis_common import METRICS, DEBUG_WRITER, Fetcher, Job
+    fx = Fetcher()
+    out = []
+    try:
+        for c in cases:
+            job = Job(c["dataset"], c["svaz"], c["rocnik"], c.get("kat", ""), c.get("zvyss", ""))
+            if c.get("paginated") and fx.mode == "http":
+                out.append({"case": label(c), "svaz": c["svaz"], "skipped": "vyžaduje prohlížeč"})
+                continue
+            hits0, bytes0 = srv.hits, srv.bytes
+            t0 = time.perf_counter()
+            METRICS.start_job(str(job))
+            try:
+                stis.run_job(fx, job)
+                err = None
+            except Exception as e:
+                err = str(e)
+            METRICS.end_job(err)
+            DEBUG_WRITER.end_job(str(job))
+            t = time.perf_counter() - t0
+            rep = METRICS.report()["jobs"][str(job)]
+            if job.dataset == "soupisky":
+                outp = scrape_soupisky.out_path(job.svaz, job.rocnik)
+            else:
+                outp = scrape_zebricek.out_path(job.svaz, job.rocnik, job.kat, job.zvyss)
+            got = read_rows(outp) if os.path.exists(outp) else []
+            exp = read_rows(os.path.join(FIXTURES, c["expected"]))
+            diff = sum(1 for a, b in zip(got, exp) if a != b) + abs(len(got) - len(exp))
+            out.append({"case": label(c), "svaz": c["svaz"], "rows": max(len(got) - 1, 0),
+                        "round_trips": srv.hits - hits0, "bytes": srv.bytes - bytes0,
+                        "s": round(t, 3), "diff_rows": diff, "error": err,
+                        "stages": rep["stages"], "counters": rep["counters"]})
+    finally:
+        fx.close()
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="offline benchmark nad bench/fixtures")
+    ap.add_argument("--fetch", default=os.getenv("FETCH", "http"), help="http / auto / browser")
+    ap.add_argument("--repeat", type=int, default=20, help="opakování parseru na stránku")
+    ap.add_argument("--latency", type=float, default=0, help="umělá latence serveru v ms")
+    ap.add_argument("--json", metavar="SOUBOR", help="výsledky navíc jako JSON")
+    a = ap.parse_args(argv)
+
+    with open(os.path.join(FIXTURES, "manifest.json"), encoding="utf-8") as f:
+        cases = json.load(f)
+    srv = start_server(a.latency)
+    work = tempfile.mkdtemp(prefix="stis-bench-")
+    json_out = os.path.abspath(a.json) if a.json else None
+    # stis_common čte prostředí a zakládá data/ při importu – až po nastavení
+    os.environ.update({"STIS_BASE": f"http://127.0.0.1:{srv.server_port}", "FETCH": a.fetch,
+                       "INCREMENTAL": "0", "SQLITE": "", "PARQUET": "0"})
+    os.environ.setdefault("RATE_MS", "0")
+    os.chdir(work)
+    sys.path.insert(0, REPO)
+    try:
+        parsers = bench_parsers(cases, a.repeat)
+        exports = bench_exports(cases, srv)
+    finally:
+        srv.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    print("parser (bez sítě):")
+    for r in parsers:
+        print(f"  {r['case']:<28} {r['rows']:>6} řádků  {r['ms']:>8.2f} ms  {r['rows_per_s']:>9} řádků/s")
+    print(f"export (FETCH={a.fetch}, latence {a.latency:g} ms):")
+    per_svaz = defaultdict(float)
+    failed = 0
+    for r in exports:
+        if r.get("skipped"):
+            print(f"  {r['case']:<28} přeskočeno – {r['skipped']}")
+            continue
+        per_svaz[r["svaz"].split("-")[0]] += r["s"]
+        ok = "ok" if not r["diff_rows"] and not r["error"] else f"ROZDÍL {r['diff_rows']} řádků"
+        if r["error"]:
+            ok += f" ({r['error']})"
+        failed += ok != "ok"
+        print(f"  {r['case']:<28} {r['rows']:>6} řádků  {r['round_trips']:>3}× GET  "
+              f"{r['counters'].get('playwright_calls', 0):>4}× PW  {r['bytes'] / 1024:>7.1f} KiB  {r['s']:>7.3f} s  {ok}")
+    print("po svazech:")
+    for svaz, s in sorted(per_svaz.items()):
+        print(f"  {svaz:<10} {s:.3f} s")
+
+    if json_out:
+        with open(json_out, "w", encoding="utf-8") as f:
+            json.dump({"fetch": a.fetch, "latency_ms": a.latency, "parsers": parsers,
+                       "exports": exports, "per_svaz_s": per_svaz}, f, ensure_ascii=False, indent=1)
+    if failed:
+        raise SystemExit(f"{failed} exportů se liší od fixtures/expected")
+
+if __name__ == "__main__":
+    main()
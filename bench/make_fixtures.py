@@ -0,0 +1,160 @@
+# bench/make_fixtures.py
+# Offline kopie stránek STIS pro bench.py, zrekonstruovaná z CSV v data/ (síť není potřeba).
+#   python bench/make_fixtures.py [ROCNIK]
+#
+# Pro každý svaz s data/soupisky_<svaz>_<ročník>.csv a data/zebricek_<svaz>_<ročník>_kat-<k>.csv:
+#   soupisky/svaz-<svaz>/rocnik-<r>/index.html
+#       první družstvo s hlavičkou "Soupiska / soutěž / oddíl", další družstvo téže soutěže jen
+#       "oddíl", nová soutěž "soutěž / oddíl" (parse_table y == 3/4); jednou na stránku před
+#       družstvem téže soutěže ještě dvě družstva bez hráčů – tři hlavičky za sebou, y == 5
+#       vrátí soutěž předchozího bloku. Prázdná družstva řádky nemají, očekávané řádky dalšího
+#       družstva jsou ty z CSV (se soutěží bloku před nimi)
+#   zebricekstr-oblast/svaz-<svaz>/rocnik-<r>/kategorie-<k>/zvyssich-ano/index.html
+#       celý žebříček v HTML (rychlá HTTP cesta)
+#   zebricekstr-oblast/svaz-<svaz>-str/...
+#       stejný žebříček po 50 řádcích, stránkovaný skriptem v prohlížeči (tlačítko "next"
+#       jako DataTables) a s jiným pořadím sloupců – HTTP cesta ho odmítne, jede fallback
+#
+# expected/*.csv = co má export vrátit; bench.py s nimi porovnává výstup. Zdrojová CSV se
+# během běhů workflow mění, proto jsou fixtures i očekávané výstupy zmražené v repozitáři.
+# Skutečné stránky místo rekonstrukce nahraje bench/record.py.
+
+import os, re, csv, sys, json, glob, html
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(ROOT, "fixtures")
+DATA = os.path.join(ROOT, "..", "data")
+PAGE = 50                                   # řádků na stránku stránkovaného žebříčku
+
+ZEBR_COLS = ["Pořadí", "Příjmení a jméno", "Rok nar.", "Oddíl", "Zápasy", "STR", "STR stabil", "STR+-"]
+ZEBR_COLS_STR = [0, 1, 3, 2, 4, 6, 5, 7]   # jiné pořadí sloupců pro stránkovanou variantu
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    return rows[0], rows[1:]
+
+def write_csv(path, header, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(header)
+        w.writerows(rows)
+
+def write_page(path, body, title):
+    full = os.path.join(FIXTURES, path, "index.html")
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w", encoding="utf-8") as f:
+        f.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+                f'</head>\n<body>\n{body}\n</body></html>\n')
+
+def tr(cells, tag="td"):
+    return "<tr>" + "".join(f"<{tag}>{c}</{tag}>" for c in cells) + "</tr>"
+
+def link(text, href):
+    t = html.escape(text)
+    return f'<a href="{html.escape(href)}">{t}</a>' if href else t
+
+# ===== soupisky =====
+def soupisky_html(rows):
+    out = ['<table class="table table-bordered soupisky">']
+    prev = None
+    empty_done = False
+    for oddil, poradi, jmeno, rok, umisteni, soutez in rows:
+        if prev is None:
+            out += [tr(["Soupiska družstev"], "th"), tr([html.escape(soutez)], "th"), tr([html.escape(oddil)], "th")]
+        elif soutez != prev[1]:
+            out += [tr([html.escape(soutez)], "th"), tr([html.escape(oddil)], "th")]
+        elif oddil != prev[0]:
+            if not empty_done:              # oddíl, oddíl, oddíl za datovým řádkem -> y == 5
+                out += [tr([html.escape(f"{prev[0]} – bez hráčů {i}")], "th") for i in (1, 2)]
+                empty_done = True
+            out.append(tr([html.escape(oddil)], "th"))
+        prev = (oddil, soutez)
+        out.append(tr([html.escape(v) for v in (poradi, jmeno, rok, umisteni)]))
+    out.append("</table>")
+    return "\n".join(out)
+
+# ===== žebříček =====
+def zebricek_cells(r):
+    poradi, jmeno, rok, oddil, zapasy, str_v, str_s, str_pm, hrac_url, _, oddil_url = r[:11]
+    return [html.escape(poradi), link(jmeno, hrac_url), html.escape(rok), link(oddil, oddil_url),
+            html.escape(zapasy), html.escape(str_v), html.escape(str_s), html.escape(str_pm)]
+
+def zebricek_html(rows):
+    out = ['<table class="table table-striped">', "<thead>" + tr(ZEBR_COLS, "th") + "</thead>", "<tbody>"]
+    out += [tr(zebricek_cells(r)) for r in rows]
+    out.append("</tbody></table>")
+    return "\n".join(out)
+
+PAGER_JS = """<script>
+const DATA = %s, N = %d;
+const tb = document.querySelector('#zebricek tbody'), next = document.querySelector('a.paginate_button.next');
+let p = 0;
+function draw() {
+    tb.innerHTML = DATA.slice(p * N, (p + 1) * N)
+        .map(r => '<tr>' + r.map(c => '<td>' + c + '</td>').join('') + '</tr>').join('');
+    next.classList.toggle('disabled', (p + 1) * N >= DATA.length);
+}
+next.addEventListener('click', e => { e.preventDefault(); if ((p + 1) * N < DATA.length) { p++; draw(); } });
+draw();
+</script>"""
+
+def zebricek_paged_html(rows):
+    data = [[zebricek_cells(r)[i] for i in ZEBR_COLS_STR] for r in rows]
+    head = [ZEBR_COLS[i] for i in ZEBR_COLS_STR]
+    js = PAGER_JS % (json.dumps(data, ensure_ascii=False).replace("</", "<\\/"), PAGE)
+    return "\n".join([
+        '<table id="zebricek" class="table table-striped">',
+        "<thead>" + tr(head, "th") + "</thead>", "<tbody></tbody></table>",
+        '<div class="dataTables_paginate"><a class="paginate_button previous disabled" href="#">Předchozí</a>'
+        '<a class="paginate_button next" href="#">Další</a></div>',
+        js,
+    ])
+
+def main(rocnik):
+    # nahrané stránky (record.py) zůstávají, rekonstrukce se přepisují
+    try:
+        with open(os.path.join(FIXTURES, "manifest.json"), encoding="utf-8") as f:
+            cases = [c for c in json.load(f) if c.get("source") == "recorded"]
+    except (OSError, ValueError):
+        cases = []
+    recorded = {(c["dataset"], c["svaz"], c["rocnik"], c.get("kat", "")) for c in cases}
+    for path in sorted(glob.glob(os.path.join(DATA, f"soupisky_*_{rocnik}.csv"))):
+        m = re.search(r"soupisky_(\d+)_", os.path.basename(path))
+        if not m:
+            continue
+        svaz = m.group(1)
+        if ("soupisky", svaz, rocnik, "") in recorded:
+            continue
+        hdr, rows = read_csv(path)
+        write_page(f"soupisky/svaz-{svaz}/rocnik-{rocnik}", soupisky_html(rows), f"Soupisky {svaz}")
+        exp = f"expected/soupisky_{svaz}_{rocnik}.csv"
+        write_csv(os.path.join(FIXTURES, exp), hdr, rows)
+        cases.append({"dataset": "soupisky", "svaz": svaz, "rocnik": rocnik, "expected": exp, "source": "csv"})
+
+    for path in sorted(glob.glob(os.path.join(DATA, f"zebricek_*_{rocnik}_kat-*.csv"))):
+        m = re.search(r"zebricek_(\d+)_\d{4}_kat-(\w+)\.csv$", os.path.basename(path))
+        if not m:
+            continue
+        svaz, kat = m.groups()
+        if ("zebricek", svaz, rocnik, kat) in recorded:
+            continue
+        hdr, rows = read_csv(path)
+        for variant, body in ((svaz, zebricek_html(rows)), (svaz + "-str", zebricek_paged_html(rows))):
+            write_page(f"zebricekstr-oblast/svaz-{variant}/rocnik-{rocnik}/kategorie-{kat}/zvyssich-ano",
+                       body, f"Žebříček {variant}")
+            exp = f"expected/zebricek_{variant}_{rocnik}_kat-{kat}.csv"
+            si = hdr.index("Svaz")
+            write_csv(os.path.join(FIXTURES, exp), hdr,
+                      [r[:si] + [variant] + r[si + 1:] for r in rows])
+            cases.append({"dataset": "zebricek", "svaz": variant, "rocnik": rocnik, "kat": kat,
+                          "zvyss": "ano", "paginated": variant != svaz, "expected": exp, "source": "csv"})
+
+    write_page("", '<p>STIS – offline kopie pro bench.py</p>', "STIS")
+    with open(os.path.join(FIXTURES, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(cases, f, ensure_ascii=False, indent=1)
+    print(f"{len(cases)} stránek -> {FIXTURES}")
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else os.getenv("ROCNIK", "2025"))
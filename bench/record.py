@@ -0,0 +1,89 @@
+# bench/record.py
+# Nahraje skutečné stránky STIS do bench/fixtures (místo rekonstrukce z make_fixtures.py).
+#   python bench/record.py --svazy 420103,420210 --rocnik 2025 --kategorie s --zvyssich ano
+#
+# Ukládá přesně to, co vrátil server (bajty odpovědi), takže bench.py přehraje i kódování
+# a okolní HTML. Očekávaný výstup (expected/*.csv) je výsledek současného parseru – po
+# kontrole zmrazený jako reference pro další změny. Stránky, kde tabulku plní až JS
+# (stránkování na serveru), HTTP nenahraje; ty se jen vypíšou.
+
+import os, sys, json, argparse
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(ROOT, "fixtures")
+sys.path.insert(0, os.path.dirname(ROOT))
+
+from make_fixtures import write_csv
+import scrape_soupisky, scrape_zebricek
+from stis import csv_list
+from stis_common import BASE, HttpClient, parse_html, html_find_class, html_table_rows
+
+def record(http, case, path):
+    r = http.get(BASE + path)
+    if r.status_code != 200:
+        print(f"{path}: HTTP {r.status_code}, přeskakuji")
+        return None
+    doc = parse_html(r)
+    if case["dataset"] == "soupisky":
+        tbl = html_find_class(doc, "table", "soupisky")
+        rows = scrape_soupisky.parse_table(html_table_rows(tbl)) if tbl is not None else []
+        header = scrape_soupisky.HEADER
+    else:
+        raw = scrape_zebricek.doc_table_rows(doc)
+        rows = scrape_zebricek.parse_page_rows(raw, case["svaz"], case["kat"], case["rocnik"]) if raw else []
+        header = scrape_zebricek.HEADER
+    if not rows:
+        print(f"{path}: tabulka v HTML chybí (plní ji JS), přeskakuji")
+        return None
+    full = os.path.join(FIXTURES, path.strip("/"), "index.html")
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "wb") as f:
+        f.write(r.content)
+    name = "_".join(str(case[k]) for k in ("dataset", "svaz", "rocnik") if case.get(k))
+    if case.get("kat"):
+        name += f"_kat-{case['kat']}_zvyssich-{case['zvyss']}"
+    case["expected"] = f"expected/{name}.csv"
+    case["source"] = "recorded"
+    write_csv(os.path.join(FIXTURES, case["expected"]), header, rows)
+    print(f"{path}: {len(rows)} řádků, {len(r.content) / 1024:.1f} KiB")
+    return case
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="nahrání stránek STIS do bench/fixtures")
+    ap.add_argument("--svazy", required=True)
+    ap.add_argument("--rocnik", default=os.getenv("ROCNIK", "2025"))
+    ap.add_argument("--kategorie", default="s")
+    ap.add_argument("--zvyssich", default="ano")
+    a = ap.parse_args(argv)
+
+    mpath = os.path.join(FIXTURES, "manifest.json")
+    try:
+        with open(mpath, encoding="utf-8") as f:
+            cases = json.load(f)
+    except (OSError, ValueError):
+        cases = []
+    key = lambda c: (c["dataset"], c["svaz"], c["rocnik"], c.get("kat", ""), c.get("zvyss", ""))
+    by_key = {key(c): c for c in cases}
+
+    http = HttpClient()
+    try:
+        for svaz in csv_list(a.svazy):
+            todo = [({"dataset": "soupisky", "svaz": svaz, "rocnik": a.rocnik},
+                     f"/soupisky/svaz-{svaz}/rocnik-{a.rocnik}")]
+            for kat in csv_list(a.kategorie):
+                for zv in csv_list(a.zvyssich):
+                    todo.append(({"dataset": "zebricek", "svaz": svaz, "rocnik": a.rocnik, "kat": kat, "zvyss": zv},
+                                 f"/zebricekstr-oblast/svaz-{svaz}/rocnik-{a.rocnik}/kategorie-{kat}/zvyssich-{zv}"))
+            for case, path in todo:
+                c = record(http, case, path)
+                if c:
+                    by_key[key(c)] = c
+    finally:
+        http.close()
+
+    with open(mpath, "w", encoding="utf-8") as f:
+        json.dump(list(by_key.values()), f, ensure_ascii=False, indent=1)
+    print(f"{len(by_key)} stránek v {mpath}")
+
+if __name__ == "__main__":
+    main()
@@ -2,49 +2,37 @@
 # CSV hlavička:
 # Oddil;P.č.;Příjmení a jméno;Rok.nar.;Umístění na žebříčku;Soutez
 
-import os, csv, time, pathlib, re
-from playwright.sync_api import sync_playwright
+import os, time, re
+from stis_common import (BASE, OUTDIR, RETRY_BUDGET_S, STATE, METRICS, Export, Job, finish, run_pool, stage,
+                         retry_sleep, wait_table_stable, YEAR_RE, table_rows,
+                         html_find_class, html_table_rows, FailureCapture, NotFound, GONE)
 
 # ===== konfigurace =====
 SVAZY   = ["420103", "420210"]                 # doplň dle potřeby
 ROCNIK  = os.getenv("ROCNIK", "2025")
-BASE    = "https://stis.ping-pong.cz"
-OUTDIR  = "data"
-DEBUG   = os.path.join(OUTDIR, "debug")
-UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-      "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
-
-pathlib.Path(OUTDIR).mkdir(parents=True, exist_ok=True)
-pathlib.Path(DEBUG).mkdir(parents=True, exist_ok=True)
+HEADER  = ["Oddil","P.č.","Příjmení a jméno","Rok.nar.","Umístění na žebříčku","Soutez"]
 
 # ===== pomocné funkce =====
-def cells_texts(row):
-    # texty ze všech buněk (td i th), ořezané
-    cells = row.query_selector_all("td, th")
-    out = []
-    for c in cells:
-        try:
-            out.append((c.inner_text() or "").strip())
-        except:
-            out.append("")
-    return out
-
-def is_year(s: str) -> bool:
-    return bool(re.fullmatch(r"(19|20)\d{2}", s.strip()))
+# vzory předkompilované jednou pro modul – volají se pro každou buňku každého řádku
+DIGITS_RE = re.compile(r"\d+")
+PORADI_RE = re.compile(r"\d+\.?")
+RANGE_RE  = re.compile(r"\d+\s*[-–]\s*\d+\.?(?:[A-Za-z])?")
+TAIL_RANK_RE = re.compile(r"(\d+)\.?\s*$")
 
 def norm_poradi(s: str) -> str:
-    m = re.search(r"\d+", s)
+    m = DIGITS_RE.search(s)
     return (m.group(0) + ".") if m else s
 
-def looks_like_rank_any(s: str) -> bool:
-    """povol běžné tvary umístění: 1., 21.-30., 21.-30.N, apod."""
+def cell_kind(s: str) -> str:
+    """jednou na buňku: 'year' (rok narození) | 'rank' (umístění) | '' (ostatní)"""
     t = s.strip()
-    if not t or is_year(t):  # rok to není
-        return False
-    return bool(
-        re.fullmatch(r"\d+\.?", t) or
-        re.fullmatch(r"\d+\s*[-–]\s*\d+\.?(?:[A-Za-z])?", t)
-    )
+    if not t:
+        return ""
+    if YEAR_RE.fullmatch(t):
+        return "year"
+    if PORADI_RE.fullmatch(t) or RANGE_RE.fullmatch(t):
+        return "rank"
+    return ""
 
 def split_comp_and_rank(text: str):
     """
@@ -52,7 +40,7 @@ def split_comp_and_rank(text: str):
     pokud číslo na konci není, vrátí (text, '')
     """
     t = text.strip()
-    m = re.search(r"(\d+)\.?\s*$", t)
+    m = TAIL_RANK_RE.search(t)
     if m:
         comp = t[:m.start()].strip(" .,-")
         rank = m.group(1) + "."
@@ -63,9 +51,18 @@ def find_table(page):
     sel = "table.soupisky, table.table.soupisky, table.table-bordered.soupisky"
     return page.query_selector(sel)
 
+def fetch_rows_http(http, url, cond=None):
+    """
+    tabulka přímo z HTML bez prohlížeče: (status, řádky, validátory)
+    řádky None = chybí (→ fallback na Playwright) nebo 304
+    """
+    status, doc, val = http.get_doc(url, cond)
+    tbl = html_find_class(doc, "table", "soupisky") if doc is not None else None
+    return status, (html_table_rows(tbl) if tbl is not None else None), val
+
 # ===== parser jedné tabulky =====
-def parse_table(tbl):
-    rows = tbl.query_selector_all("tr")
+def parse_table(rows):
+    # rows = výstup table_rows(), dál už jen čisté seznamy
     y = 0
     oddil = ""
     soutez_text = ""
@@ -73,19 +70,19 @@ def parse_table(tbl):
     header_rank = ""         # např. '14.' z hlavičky "kraj. muži 14."
     out = []
 
-    for r in rows:
-        cols = cells_texts(r)  # bere <td> i <th>
+    for _, cols, _ in rows:   # bere <td> i <th>
         if not cols:
             continue
 
         first = cols[0].strip()
 
         # Datový řádek – první buňka je pořadí (číslo)
-        if first[:1].isdigit() and re.match(r"^\d+\.?$", first):
+        if first[:1].isdigit() and PORADI_RE.fullmatch(first):
             poradi = norm_poradi(first)
+            kinds = [cell_kind(v) for v in cols]   # každá buňka se klasifikuje jen jednou
 
             # zjisti rok narození + celé jméno (nedělíme)
-            year_idx = next((i for i, v in enumerate(cols) if is_year(v)), -1)
+            year_idx = kinds.index("year") if "year" in kinds else -1
             rocnik = ""
             cele_jmeno = ""
             umisteni = ""
@@ -110,12 +107,9 @@ def parse_table(tbl):
 
             if not umisteni:
                 # hledej kdekoli v řádku položku vypadající jako umístění (kromě 1. sloupce P.č.)
-                for idx, v in enumerate(cols):
-                    if idx == 0:
-                        continue
-                    if looks_like_rank_any(v):
-                        umisteni = v.strip()
-                        break
+                idx = next((i for i in range(1, len(kinds)) if kinds[i] == "rank"), -1)
+                if idx >= 0:
+                    umisteni = cols[idx].strip()
 
             if not umisteni and header_rank:
                 umisteni = header_rank  # použij číslo z hlavičky, např. '14.'
@@ -152,77 +146,76 @@ def parse_table(tbl):
 
     return out
 
-def warmup(page):
-    # získat session cookie, ale nečekat na "networkidle" (na STIS často nikdy nenastane)
-    page.set_extra_http_headers({"Accept-Language": "cs,en;q=0.8"})
-    page.set_default_timeout(45000)
+def out_path(svaz, rocnik=ROCNIK):
+    return os.path.join(OUTDIR, f"soupisky_{svaz}_{rocnik}.csv")
 
-    # stačí DOMContentLoaded; networkidle vynecháme
-    page.goto(BASE + "/", wait_until="domcontentloaded", timeout=45000)
-    try:
-        # lehké dovyčkání na onload, ale krátké a tolerantní
-        page.wait_for_load_state("load", timeout=5000)
-    except:
-        pass
-
-    # nechat doběhnout kratší skripty
-    page.wait_for_timeout(400)
-
-def export_svaz(page, svaz):
-    url = f"{BASE}/soupisky/svaz-{svaz}/rocnik-{ROCNIK}"
+def save_rows(job, outp, url, raw, val=None):
+    """
+    parsuje a zapíše tabulku (tmp + atomické přejmenování); při stejném hashi jako minule
+    (INCREMENTAL) jen potvrdí stav. False = tabulka bez datových řádků
+    """
+    with Export(url, outp, HEADER, job) as ex:
+        if ex.same_as_before([raw], val):
+            return True
+        with stage("parse"):
+            rows = parse_table(raw)
+        ex.add(raw, rows)
+        return ex.finish(val)
+
+def export_svaz(fx, svaz, rocnik=ROCNIK):
+    url = f"{BASE}/soupisky/svaz-{svaz}/rocnik-{rocnik}"
+    outp = out_path(svaz, rocnik)
+    job = Job("soupisky", svaz, rocnik)
+
+    # --- rychlá cesta: HTTP + lxml ---
+    if fx.http:
+        try:
+            status, raw, val = fetch_rows_http(fx.http, url, STATE.cond(url, outp))
+        except Exception as e:
+            print(f"{svaz}: HTTP selhalo ({e}), zkusím prohlížeč")
+            status, raw, val = None, None, None
+        if status in GONE:
+            raise NotFound(f"soupisky svazu {svaz} pro ročník {rocnik} neexistují ({status})")
+        if status == 304:
+            print(f"{svaz}: beze změny (304)")
+            STATE.commit(url, str(job), False)
+            return
+        if raw and save_rows(job, outp, url, raw, val):
+            return
+        print(f"{svaz}: tabulka v HTML chybí, zkusím prohlížeč")
+        METRICS.count("browser_fallback")
+
+    page = fx.page()
+    cap = FailureCapture(f"svaz_{svaz}")
     attempts = 8
+    deadline = time.monotonic() + RETRY_BUDGET_S
     for a in range(1, attempts+1):
-        resp = page.goto(url, wait_until="domcontentloaded", timeout=45000)
+        resp = fx.goto(url, wait_until="domcontentloaded", timeout=45000)
         status = resp.status if resp else None
-        try:
-            page.wait_for_load_state("networkidle", timeout=15000)
-        except:
-            pass
-        page.wait_for_timeout(800 + 200*a)
-
-        tbl = find_table(page)
-        if tbl:
-            rows = parse_table(tbl)
-            if rows:
-                outp = os.path.join(OUTDIR, f"soupisky_{svaz}_{ROCNIK}.csv")
-                with open(outp, "w", newline="", encoding="utf-8") as f:
-                    w = csv.writer(f, delimiter=";")
-                    w.writerow(["Oddil","P.č.","Příjmení a jméno","Rok.nar.","Umístění na žebříčku","Soutez"])
-                    w.writerows(rows)
-                print(f"{svaz}: {len(rows)} řádků -> {outp}")
-                return
-
-        # --- debug + další pokus ---
-        html = page.content()
-        with open(os.path.join(DEBUG, f"svaz_{svaz}_attempt{a}_status{status or 0}.html"),
-                  "w", encoding="utf-8") as f:
-            f.write(html)
-        try:
-            page.screenshot(path=os.path.join(DEBUG, f"svaz_{svaz}_attempt{a}.png"),
-                            full_page=True)
-        except:
-            pass
-        time.sleep(0.6 + 0.4*a)
-
-    raise RuntimeError(f"Nenalezena tabulka pro svaz {svaz} po {attempts} pokusech")
+        if status in GONE:
+            raise NotFound(f"soupisky svazu {svaz} pro ročník {rocnik} neexistují ({status})")
+        # místo networkidle + pevných pauz: počet řádků soupisky se přestal měnit
+        waited = wait_table_stable(page, "table.soupisky tr", 1, timeout_ms=10000 + a*3000)
+        print(f"{svaz}: pokus {a}, tabulka " +
+              (f"připravena za {waited} ms" if waited is not None else "nedočkána (timeout)"))
+
+        with stage("find_table"):
+            tbl = find_table(page)
+        if tbl and save_rows(job, outp, url, table_rows(tbl)):
+            return
+
+        # --- debug (zapisuje se na pozadí) + další pokus ---
+        cap.attempt(page, a, status)
+        if a == attempts or not retry_sleep(a, deadline):
+            break
+
+    cap.final(page)
+    raise RuntimeError(f"Nenalezena tabulka pro svaz {svaz} po {a} pokusech")
 
 # ===== main =====
 def main():
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(
-            headless=True,
-            args=["--disable-dev-shm-usage", "--no-sandbox"]
-        )
-        context = browser.new_context(
-            user_agent=UA,
-            viewport={"width":1366, "height":900},
-            locale="cs-CZ"
-        )
-        page = context.new_page()
-        warmup(page)
-        for svaz in SVAZY:
-            export_svaz(page, svaz)
-        browser.close()
+    # samostatně jen soupisky; oba datasety najednou viz stis.py
+    finish(run_pool(SVAZY, export_svaz))
 
 if __name__ == "__main__":
     main()
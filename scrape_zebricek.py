@@ -2,49 +2,55 @@
 # CSV: Poradi;Příjmení a jméno;Rok.nar.;Oddil;Zápasy;STR;STR stabil;STR+-;
 #      HracURL;HracID;OddilURL;OddilID;Svaz;Kategorie;Rocnik
 
-import os, csv, time, pathlib, re, unicodedata
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+import os, time, re
+from functools import lru_cache
+from stis_common import (BASE, OUTDIR, RETRY_BUDGET_S, STATE, METRICS, Export, Job, PWTimeout, finish,
+                         run_pool, stage,
+                         retry_sleep, wait_table_stable, YEAR_RE, table_rows,
+                         html_table_rows, FailureCapture, NotFound, GONE, WS_RE, stripdia, normcmp)
 
-BASE    = "https://stis.ping-pong.cz"
-OUTDIR  = "data"
-DEBUG   = os.path.join(OUTDIR, "debug")
 SVAZY   = [s.strip() for s in os.getenv("ZEBR_SVAZY", "420210").split(",") if s.strip()]
 ROCNIK  = os.getenv("ROCNIK", "2025")
 KAT     = os.getenv("KATEGORIE", "s")             # "s" = dospělí
 ZVYSS   = os.getenv("ZVYSSICH", "ano")            # "ano" / "ne"
-
-UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-      "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
-
-pathlib.Path(OUTDIR).mkdir(parents=True, exist_ok=True)
-pathlib.Path(DEBUG).mkdir(parents=True, exist_ok=True)
+HEADER  = ["Poradi","Příjmení a jméno","Rok.nar.","Oddil",
+           "Zápasy","STR","STR stabil","STR+-",
+           "HracURL","HracID","OddilURL","OddilID",
+           "Svaz","Kategorie","Rocnik"]
 
 # ---------- util ----------
-def stripdia(s: str) -> str:
-    return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii")
+# vzory předkompilované jednou pro modul – parse_page_rows je volá pro každou buňku
+HDR_JUNK_RE = re.compile(r"[^a-z0-9+\- ]")
+NUM_RE     = re.compile(r"-?\d+(?:\.\d+)?")
+LEAD_NUM_RE = re.compile(r"\s*(\d+)")
+HRAC_HREF_RE  = re.compile(r"/(hrac|osoba)", re.I)
+ODDIL_HREF_RE = re.compile(r"/(oddil|klub|druzstvo)", re.I)
+ID_RES = [re.compile(p) for p in (
+    r'(?i)(?:hracid|osobaid|klubid|oddilid|druzstvoid|id)=\s*(\d+)',
+    r'/hrac(?:/|[-_])(\d+)',
+    r'/osoba(?:/|[-_])(\d+)',
+    r'/klub(?:/|[-_])(\d+)',
+    r'/oddil(?:/|[-_])(\d+)',
+    r'/druzstvo(?:/|[-_])(\d+)',
+    r'[?&]id=(\d+)',
+)]
+LAST_NUM_RE = re.compile(r'(\d+)(?!.*\d)')
 
 def normhdr(s: str) -> str:
     t = stripdia(s).lower()
     t = t.replace("•", " ").replace("±", "+-").replace("+−", "+-").replace("–", "-").replace("—", "-")
-    t = re.sub(r"[^a-z0-9+\- ]", " ", t)
-    t = re.sub(r"\s+", " ", t).strip()
+    t = HDR_JUNK_RE.sub(" ", t)
+    t = WS_RE.sub(" ", t).strip()
     return t
 
-def normcmp(s: str) -> str:
-    # pro porovnávání textů (jméno/oddíl vs. text odkazu)
-    t = stripdia(s or "").lower()
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+def head_texts(rows):
+    # první řádek z <thead>
+    return next((cols for kind, cols, _ in rows if kind == "thead"), [])
 
-def cells_texts(row):
-    cells = row.query_selector_all("th, td")
-    out = []
-    for c in cells:
-        try:
-            out.append((c.inner_text() or "").strip())
-        except:
-            out.append("")
-    return out
+def body_rows(rows):
+    # řádky z <tbody>; bez tbody celá tabulka
+    body = [r for r in rows if r[0] == "tbody"]
+    return body or rows
 
 def make_abs_url(href: str) -> str:
     if not href:
@@ -58,82 +64,101 @@ def make_abs_url(href: str) -> str:
 def extract_id_from_url(url: str) -> str:
     if not url:
         return ""
-    pats = [
-        r'(?i)(?:hracid|osobaid|klubid|oddilid|druzstvoid|id)=\s*(\d+)',
-        r'/hrac(?:/|[-_])(\d+)',
-        r'/osoba(?:/|[-_])(\d+)',
-        r'/klub(?:/|[-_])(\d+)',
-        r'/oddil(?:/|[-_])(\d+)',
-        r'/druzstvo(?:/|[-_])(\d+)',
-        r'[?&]id=(\d+)',
-    ]
-    for p in pats:
-        m = re.search(p, url)
+    for rx in ID_RES:
+        m = rx.search(url)
         if m:
             return m.group(1)
     # fallback: poslední číslo v URL
-    m = re.search(r'(\d+)(?!.*\d)', url)
+    m = LAST_NUM_RE.search(url)
     return m.group(1) if m else ""
 
-def warmup(page):
-    page.set_extra_http_headers({"Accept-Language":"cs,en;q=0.8"})
-    page.set_default_timeout(45000)
-    page.goto(BASE + "/", wait_until="domcontentloaded", timeout=45000)
-    try:
-        page.wait_for_load_state("load", timeout=5000)
-    except:
-        pass
-    page.wait_for_timeout(300)
-
-def wait_rows_ready(page, timeout_ms=60000):
-    page.wait_for_function(
-        """() => {
-            const tbls = Array.from(document.querySelectorAll('table'));
-            for (const t of tbls) {
-              const tb = t.tBodies && t.tBodies[0];
-              if (!tb) continue;
-              if (tb.querySelectorAll('tr').length >= 3) return true;
-            }
-            return false;
-        }""",
-        timeout=timeout_ms
-    )
+def score_table(headers, nrows):
+    # headers = normhdr() texty hlavičky, nrows = počet řádků v tbody
+    sc = 0
+    for h in headers:
+        if "por" in h: sc += 1
+        if "hrac" in h or "jmen" in h or "prijmeni" in h: sc += 2
+        if "rok" in h and ("nar" in h or "naro" in h): sc += 2
+        if "oddil" in h or "klub" in h or "tym" in h: sc += 2
+        if "zapasy" in h: sc += 3
+        if h == "str": sc += 3
+        if "str stabil" in h: sc += 3
+        if "str+-" in h: sc += 3
+    return sc + min(nrows, 100) / 20.0
+
+# všechny tabulky stránky jedním page.evaluate: [texty hlavičky, počet řádků v tbody]
+# (dřív dotaz na thead/tr/buňky/řádky zvlášť pro každou tabulku)
+TABLES_JS = """() => Array.from(document.querySelectorAll('table')).map(t => {
+    const head = t.querySelector('thead');
+    const tr = head ? head.querySelector('tr') : t.querySelector('tr');
+    return [tr ? Array.from(tr.querySelectorAll('th, td')).map(c => (c.innerText || '').trim()) : [],
+            (t.querySelector('tbody') || t).querySelectorAll('tr').length];
+})"""
+
+# hlavička už vybrané tabulky; null = tabulku stránka mezitím nahradila
+TABLE_HEAD_JS = """(t) => {
+    if (!t.isConnected) return null;
+    const head = t.querySelector('thead');
+    const tr = head ? head.querySelector('tr') : t.querySelector('tr');
+    return tr ? Array.from(tr.querySelectorAll('th, td')).map(c => (c.innerText || '').trim()) : [];
+}"""
 
 def find_best_table(page):
-    tbls = page.query_selector_all("table")
+    """(tabulka, podpis hlavičky) nejlépe skórované tabulky, (None, None) bez tabulek"""
+    tables = page.evaluate(TABLES_JS) or []
     best, score_best = None, -1
-    for t in tbls:
-        sc = 0
-        thead = t.query_selector("thead")
-        headers = []
-        if thead:
-            tr = thead.query_selector("tr")
-            if tr: headers = [normhdr(x) for x in cells_texts(tr)]
-        else:
-            tr0 = t.query_selector("tr")
-            if tr0: headers = [normhdr(x) for x in cells_texts(tr0)]
-
-        for h in headers:
-            if "por" in h: sc += 1
-            if "hrac" in h or "jmen" in h or "prijmeni" in h: sc += 2
-            if "rok" in h and ("nar" in h or "naro" in h): sc += 2
-            if "oddil" in h or "klub" in h or "tym" in h: sc += 2
-            if "zapasy" in h: sc += 3
-            if h == "str": sc += 3
-            if "str stabil" in h: sc += 3
-            if "str+-" in h: sc += 3
-        tb = t.query_selector("tbody") or t
-        sc += min(len(tb.query_selector_all("tr")), 100) / 20.0
+    for i, (head, nrows) in enumerate(tables):
+        sc = score_table([normhdr(x) for x in head], nrows)
         if sc > score_best:
-            best, score_best = t, sc
+            best, score_best = i, sc
+    if best is None:
+        return None, None
+    table = page.evaluate_handle("(i) => document.querySelectorAll('table')[i]", best).as_element()
+    return table, tuple(tables[best][0])
+
+def same_table(table, sig):
+    # po stránkování: pořád tatáž tabulka se stejnou hlavičkou? (jedno volání místo nového skórování)
+    try:
+        head = table.evaluate(TABLE_HEAD_JS)
+    except Exception:
+        return False
+    return head is not None and tuple(head) == sig
+
+def fetch_rows_http(http, url, cond=None):
+    """
+    nejlepší tabulka přímo z HTML bez prohlížeče: (status, řádky, validátory)
+    řádky None (→ fallback na Playwright), když
+    - tabulka má v tbody < 3 řádky (plní ji až JS)
+    - stránkování renderuje server (paginate_button už v HTML) – bez klikání by chyběly další stránky
+    - server vrátil 304 (INCREMENTAL)
+    """
+    status, doc, val = http.get_doc(url, cond)
+    return status, (doc_table_rows(doc) if doc is not None else None), val
+
+def doc_table_rows(doc):
+    # nejlépe skórovaná tabulka z lxml dokumentu; None = bez prohlížeče nejde (viz výše)
+    if doc.find_class("paginate_button"):
+        return None
+    best, score_best = None, -1
+    for t in doc.iter("table"):
+        rows = html_table_rows(t)
+        head = head_texts(rows) or (rows[0][1] if rows else [])
+        body = [r for r in rows if r[0] == "tbody"]
+        sc = score_table([normhdr(x) for x in head], len(body))
+        if sc > score_best:
+            best, score_best = rows, sc
+    if not best or len([r for r in best if r[0] == "tbody"]) < 3:
+        return None
     return best
 
-def map_columns(table):
-    thead = table.query_selector("thead")
-    hdrs = []
-    if thead:
-        tr = thead.query_selector("tr")
-        if tr: hdrs = [normhdr(x) for x in cells_texts(tr)]
+def map_columns(head):
+    # hlavička je na všech stránkách (i ve všech žebříčcích) stejná – mapa jednou na podpis;
+    # vrácený slovník je sdílený, nepřepisovat
+    return column_map(tuple(head))
+
+@lru_cache(maxsize=256)
+def column_map(sig):
+    hdrs = [normhdr(x) for x in sig]
 
     idx = {"poradi": None, "jmeno": None, "rok": None, "oddil": None,
            "zapasy": None, "str": None, "str_stabil": None, "str_pm": None}
@@ -157,22 +182,24 @@ def map_columns(table):
             idx["str"] = i
     return idx
 
-def is_year(s: str) -> bool:
-    return bool(re.fullmatch(r"(19|20)\d{2}", s.strip()))
-
-def is_num(s: str) -> bool:
-    t = s.strip().replace(",", ".")
-    return bool(re.fullmatch(r"-?\d+(?:\.\d+)?", t))
-
-def parse_page_rows(table, svaz):
+def cell_kind(s: str) -> str:
+    """jednou na buňku: 'year' (rok, zároveň číslo) | 'num' | 'text' | '' (prázdná)"""
+    t = s.strip()
+    if not t:
+        return ""
+    if YEAR_RE.fullmatch(t):
+        return "year"
+    if NUM_RE.fullmatch(t.replace(",", ".")):
+        return "num"
+    return "text"
+
+def parse_page_rows(rows, svaz, kat=KAT, rocnik=ROCNIK):
+    # rows = výstup table_rows(), dál už jen čisté seznamy
     out = []
-    tbody = table.query_selector("tbody") or table
-    rows = tbody.query_selector_all("tr")
-    hdrmap = map_columns(table)
+    hdrmap = map_columns(head_texts(rows))
 
-    for r in rows:
-        cols = cells_texts(r)
-        if not cols: 
+    for _, cols, links in body_rows(rows):
+        if not cols:
             continue
 
         def get(i):
@@ -187,149 +214,224 @@ def parse_page_rows(table, svaz):
         str_s  = get(hdrmap["str_stabil"])
         str_pm = get(hdrmap["str_pm"])
 
-        # --- fallbacky ---
+        # --- fallbacky – nad jednou klasifikací buněk řádku ---
+        kinds = [cell_kind(v) for v in cols]
         if not poradi:
-            m = re.match(r"^\s*(\d+)", cols[0])
+            m = LEAD_NUM_RE.match(cols[0])
             poradi = m.group(1) if m else ""
-        if not rok:
-            for v in cols:
-                if is_year(v): rok = v; break
+        if not rok and "year" in kinds:
+            rok = cols[kinds.index("year")]
         if not oddil:
-            for v in reversed(cols):
-                if v and not is_num(v) and not is_year(v):
-                    if normcmp(v) != normcmp(jmeno):
-                        oddil = v; break
+            n_jmeno = normcmp(jmeno)
+            for v, k in zip(reversed(cols), reversed(kinds)):
+                if k == "text" and normcmp(v) != n_jmeno:
+                    oddil = v; break
         if not jmeno:
             best = ""
-            for v in cols:
-                if v and v != oddil and not is_year(v):
-                    if len(v) > len(best) and not re.search(r"^\d", v):
+            for v, k in zip(cols, kinds):
+                if v and k != "year" and v != oddil:
+                    if len(v) > len(best) and not v[:1].isdecimal():
                         best = v
             jmeno = best
 
         # STR/STR stabil/STR+- – když chybí, zkus čísla u konce
-        nums = [v for v in cols if is_num(v)]
+        nums = [v for v, k in zip(cols, kinds) if k in ("num", "year")]
         if not str_v and len(nums) >= 1:
             str_v = nums[-3] if len(nums) >= 3 else nums[-1]
         if not str_s and len(nums) >= 2:
-            str_s = nums[-2] if len(nums) >= 2 else ""
+            str_s = nums[-2]
         if not str_pm:
-            pm = ""
-            for v in reversed(cols):
-                if is_num(v): pm = v; break
-            str_pm = pm
+            str_pm = nums[-1] if nums else ""
 
         # --- odkazy / ID ---
         hrac_url = ""
         oddil_url = ""
-        try:
-            for a in r.query_selector_all("a"):
-                atxt = (a.inner_text() or "").strip()
-                href = a.get_attribute("href") or ""
-                url  = make_abs_url(href)
-                n_atxt = normcmp(atxt)
-                if not hrac_url and (n_atxt == normcmp(jmeno) or re.search(r'/(hrac|osoba)', href, re.I)):
-                    hrac_url = url
-                if not oddil_url and (n_atxt == normcmp(oddil) or re.search(r'/(oddil|klub|druzstvo)', href, re.I)):
-                    oddil_url = url
-        except:
-            pass
+        n_jmeno, n_oddil = normcmp(jmeno), normcmp(oddil)
+        for atxt, href in links:
+            n_atxt = normcmp(atxt)
+            if not hrac_url and (n_atxt == n_jmeno or HRAC_HREF_RE.search(href)):
+                hrac_url = make_abs_url(href)
+            if not oddil_url and (n_atxt == n_oddil or ODDIL_HREF_RE.search(href)):
+                oddil_url = make_abs_url(href)
 
         hrac_id  = extract_id_from_url(hrac_url)
         oddil_id = extract_id_from_url(oddil_url)
 
         out.append([poradi, jmeno, rok, oddil, zapasy, str_v, str_s, str_pm,
                     hrac_url, hrac_id, oddil_url, oddil_id,
-                    svaz, KAT.upper(), ROCNIK])
+                    svaz, kat.upper(), rocnik])
     return out
 
+# DataTables: délka stránky -1 = všechny řádky najednou (místo klikání přes stránkování)
+SHOW_ALL_JS = """(t) => {
+    let api = null;
+    try {
+        const $ = window.jQuery;
+        if ($ && $.fn.dataTable && $.fn.dataTable.isDataTable(t)) api = $(t).DataTable();
+        else if (window.DataTable && DataTable.isDataTable && DataTable.isDataTable(t)) api = new DataTable(t);
+    } catch (e) { api = null; }
+    if (api) {
+        if (api.page.info().pages <= 1) return 'single';
+        const server = api.settings()[0].oFeatures.bServerSide;
+        api.page.len(-1).draw(false);
+        return server ? 'server' : 'client';
+    }
+    const sel = document.querySelector("select[name$='_length']");
+    if (sel && Array.from(sel.options).some(o => o.value === '-1')) {
+        sel.value = '-1';
+        sel.dispatchEvent(new Event('change', {bubbles: true}));
+        return 'select';
+    }
+    return null;
+}"""
+
+def show_all_rows(page, table):
+    """
+    přepne tabulku na všechny řádky; True = v DOM je celý žebříček.
+    'client'/'single' platí hned, 'server'/'select' čeká, až řádky přibudou.
+    Při neúspěchu zůstane click_next_if_any jako fallback.
+    """
+    try:
+        before = table.evaluate("(t) => (t.tBodies[0] || t).rows.length")
+        mode = table.evaluate(SHOW_ALL_JS)
+    except Exception:
+        return False
+    if mode in ("client", "single"):
+        return True
+    if not mode:
+        return False
+    try:
+        page.wait_for_function(
+            "([t, n]) => (t.tBodies[0] || t).rows.length > n",
+            arg=[table, before], timeout=15000
+        )
+    except PWTimeout:
+        return False
+    return True
+
+NEXT_SEL = ", ".join([
+    "a.paginate_button.next:not(.disabled)",
+    "li.paginate_button.next:not(.disabled) a",
+    "a[aria-label='Next']:not(.disabled)",
+    "button[aria-label='Next']:not([disabled])",
+])
+
+FIRST_CELL_JS = """(t) => {
+    const c = (t.querySelector('tbody') || t).querySelector('tr td, tr th');
+    return c ? (c.textContent || '').trim() : '';
+}"""
+
+# nová stránka = jiný text první buňky, nebo tabulku stránka nahradila (najde ji same_table)
+PAGE_CHANGED_JS = """([t, prev]) => {
+    if (!t.isConnected) return true;
+    const c = (t.querySelector('tbody') || t).querySelector('tr td, tr th');
+    const now = c ? (c.textContent || '').trim() : '';
+    return now && now !== prev;
+}"""
+
 def click_next_if_any(page, table):
-    candidates = [
-        "a.paginate_button.next:not(.disabled)",
-        "li.paginate_button.next:not(.disabled) a",
-        "a[aria-label='Next']:not(.disabled)",
-        "button[aria-label='Next']:not([disabled])",
-    ]
-    for sel in candidates:
-        el = page.query_selector(sel)
-        if el:
-            tb = table.query_selector("tbody") or table
-            cell = tb.query_selector("tr td, tr th")
-            before = cell.inner_text().strip() if cell else ""
-            el.click()
-            try:
-                page.wait_for_timeout(300)
-                page.wait_for_function(
-                    """(prev) => {
-                        const tb = document.querySelector('table tbody') || document.querySelector('table');
-                        const c = tb && tb.querySelector('tr td, tr th');
-                        const now = c ? (c.textContent||'').trim() : '';
-                        return now && now !== prev;
-                    }""",
-                    timeout=4000, arg=before
-                )
-            except PWTimeout:
-                return False
-            return True
-    return False
-
-def export_zebricek(page, svaz):
-    url = f"{BASE}/zebricekstr-oblast/svaz-{svaz}/rocnik-{ROCNIK}/kategorie-{KAT}/zvyssich-{ZVYSS}"
+    el = page.query_selector(NEXT_SEL)
+    if not el:
+        return False
+    before = table.evaluate(FIRST_CELL_JS)
+    el.click()
+    try:
+        page.wait_for_function(PAGE_CHANGED_JS, arg=[table, before], timeout=4000)
+    except PWTimeout:
+        return False
+    return True
+
+def out_path(svaz, rocnik=ROCNIK, kat=KAT, zvyss=ZVYSS):
+    # "ano" bez přípony (dosavadní jména souborů), jinak _zvyssich-<x>, ať se varianty nepřepisují
+    suffix = "" if zvyss in ("", "ano") else f"_zvyssich-{zvyss}"
+    return os.path.join(OUTDIR, f"zebricek_{svaz}_{rocnik}_kat-{kat}{suffix}.csv")
+
+def export_zebricek(fx, svaz, rocnik=ROCNIK, kat=KAT, zvyss=ZVYSS):
+    url = f"{BASE}/zebricekstr-oblast/svaz-{svaz}/rocnik-{rocnik}/kategorie-{kat}/zvyssich-{zvyss}"
+    outp = out_path(svaz, rocnik, kat, zvyss)
+    job = Job("zebricek", svaz, rocnik, kat, zvyss)
+
+    # --- rychlá cesta: HTTP + lxml (klientské DataTables mají v HTML všechny řádky) ---
+    if fx.http:
+        try:
+            status, raw, val = fetch_rows_http(fx.http, url, STATE.cond(url, outp))
+        except Exception as e:
+            print(f"{svaz}: HTTP selhalo ({e}), zkusím prohlížeč")
+            status, raw, val = None, None, None
+        if status in GONE:
+            raise NotFound(f"žebříček {svaz} {rocnik} kat-{kat} zvyssich-{zvyss} neexistuje ({status})")
+        if status == 304:
+            print(f"{svaz}: žebříček ({kat}) beze změny (304)")
+            STATE.commit(url, str(job), False)
+            return
+        if raw:
+            with Export(url, outp, HEADER, job) as ex:
+                if ex.same_as_before([raw], val):
+                    return
+                with stage("parse"):
+                    rows = parse_page_rows(raw, svaz, kat, rocnik)
+                ex.add(raw, rows)
+                if ex.finish(val):
+                    return
+        print(f"{svaz}: žebříček v HTML chybí, zkusím prohlížeč")
+        METRICS.count("browser_fallback")
+
+    page = fx.page()
+    cap = FailureCapture(f"zebricek_{svaz}")
     attempts = 6
+    deadline = time.monotonic() + RETRY_BUDGET_S
     for a in range(1, attempts+1):
-        resp = page.goto(url, wait_until="domcontentloaded", timeout=45000)
+        resp = fx.goto(url, wait_until="domcontentloaded", timeout=45000)
         status = resp.status if resp else None
-        try:
-            wait_rows_ready(page, timeout_ms=18000 + a*4000)
-        except PWTimeout:
-            pass
-
-        table = find_best_table(page)
-        rows_all = []
-        if table:
-            rows_all.extend(parse_page_rows(table, svaz))
-            step = 0
-            while click_next_if_any(page, table) and step < 80:
-                table = find_best_table(page) or table
-                rows_all.extend(parse_page_rows(table, svaz))
-                step += 1
-
-        if rows_all:
-            outp = os.path.join(OUTDIR, f"zebricek_{svaz}_{ROCNIK}_kat-{KAT}.csv")
-            with open(outp, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f, delimiter=";")
-                w.writerow([
-                    "Poradi","Příjmení a jméno","Rok.nar.","Oddil",
-                    "Zápasy","STR","STR stabil","STR+-",
-                    "HracURL","HracID","OddilURL","OddilID",
-                    "Svaz","Kategorie","Rocnik"
-                ])
-            #   psát po částech kvůli velikosti? tady stačí jednou:
-                w.writerows(rows_all)
-            print(f"{svaz}: žebříček ({KAT}) {len(rows_all)} řádků -> {outp}")
-            return
-
-        # debug + retry
-        html = page.content()
-        with open(os.path.join(DEBUG, f"zebricek_{svaz}_attempt{a}_status{status or 0}.html"), "w", encoding="utf-8") as f:
-            f.write(html)
-        try:
-            page.screenshot(path=os.path.join(DEBUG, f"zebricek_{svaz}_attempt{a}.png"), full_page=True)
-        except:
-            pass
-        time.sleep(0.6 + 0.4*a)
-
+        if status in GONE:
+            raise NotFound(f"žebříček {svaz} {rocnik} kat-{kat} zvyssich-{zvyss} neexistuje ({status})")
+        # tbody žebříčku má >= 3 řádky a jejich počet se přestal měnit
+        waited = wait_table_stable(page, None, 3, timeout_ms=18000 + a*4000)
+        print(f"{svaz}: pokus {a}, žebříček " +
+              (f"připraven za {waited} ms" if waited is not None else "nedočkán (timeout)"))
+
+        # každá stránka jde rovnou do tmp souboru, v paměti se nedrží
+        with Export(url, outp, HEADER, job) as ex:
+            with stage("find_table"):
+                table, sig = find_best_table(page)
+            if table:
+                with stage("paginate"):
+                    all_rows = show_all_rows(page, table)
+                if all_rows:
+                    print(f"{svaz}: žebříček načten najednou (bez stránkování)")
+                raw = table_rows(table)
+                with stage("parse"):
+                    rows = parse_page_rows(raw, svaz, kat, rocnik)
+                ex.add(raw, rows)
+                step = 0    # fallback: po zobrazení všeho je "next" disabled a smyčka hned skončí
+                while step < 80:
+                    with stage("paginate"):
+                        if not click_next_if_any(page, table):
+                            break
+                    with stage("find_table"):
+                        if not same_table(table, sig):
+                            t, t_sig = find_best_table(page)
+                            if t:
+                                table, sig = t, t_sig
+                    raw = table_rows(table)
+                    with stage("parse"):
+                        rows = parse_page_rows(raw, svaz, kat, rocnik)
+                    ex.add(raw, rows)
+                    step += 1
+            if ex.finish():
+                return
+
+        # debug (zapisuje se na pozadí) + retry
+        cap.attempt(page, a, status)
+        if a == attempts or not retry_sleep(a, deadline):
+            break
+
+    cap.final(page)
     raise RuntimeError(f"Žebříček pro svaz {svaz} se nepodařilo načíst.")
 
 def main():
-    with sync_playwright() as pw:
-        browser = pw.chromium.launch(headless=True, args=["--disable-dev-shm-usage","--no-sandbox"])
-        ctx = browser.new_context(user_agent=UA, viewport={"width":1366,"height":900}, locale="cs-CZ")
-        page = ctx.new_page()
-        warmup(page)
-        for svaz in SVAZY:
-            export_zebricek(page, svaz)
-        browser.close()
+    # samostatně jen žebříček; oba datasety najednou viz stis.py
+    finish(run_pool(SVAZY, export_zebricek))
 
 if __name__ == "__main__":
     main()
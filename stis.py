@@ -0,0 +1,200 @@
+# stis.py
+# Jeden vstup pro soupisky i žebříčky: matice úloh dataset × svaz × ročník × kategorie
+# běží v jednom poolu, takže prohlížeč (jen při fallbacku) a session startují jednou
+# na vlákno, ne jednou na dataset.
+#
+#   python stis.py --datasets soupisky,zebricek --svazy 420103,420210 \
+#                  --rocniky 2025 --kategorie s --zvyssich ano
+#
+# Výchozí hodnoty bere z prostředí jako samostatné skripty (SVAZY/ZEBR_SVAZY, ROCNIK,
+# KATEGORIE, ZVYSSICH, WORKERS).
+#
+# Backfill historie – ročníky jako rozsah, úlohy s hotovým výstupem na disku se přeskočí,
+# hotové/selhané se průběžně zapisují do data/.backfill.json, takže přerušený běh navazuje:
+#   python stis.py --backfill --datasets zebricek --rocniky 2016-2025 \
+#                  --kategorie s,d,z --zvyssich ano,ne
+# Kombinace, které na STIS neexistují (404/410), skončí hned bez prohlížeče a zapíšou se
+# jako "missing" – další běhy je přeskočí. Ostatní chyby vynechá --skip-failed.
+#
+# Celá ČR: --svazy all bere seznam z data/svazy.json (discovery při prvním běhu nebo s
+# --discover), SHARD_INDEX/SHARD_COUNT z něj nechá jen svazy tohoto shardu, --merge
+# spojí per-svaz CSV do data/cr/ (viz stis_svazy):
+#   SHARD_INDEX=0 SHARD_COUNT=4 python stis.py --svazy all
+
+import os, json, argparse, threading
+import scrape_soupisky, scrape_zebricek, stis_common, stis_svazy
+from stis_common import (OUTDIR, SHARD_COUNT, SHARD_INDEX, WORKERS, Job, NotFound, finish, outputs_exist,
+                         run_pool)
+
+DATASETS = ("soupisky", "zebricek")
+
+def csv_list(s):
+    return [x.strip() for x in (s or "").split(",") if x.strip()]
+
+def year_list(s):
+    """'2016-2025,2012' -> ['2016', ..., '2025', '2012']"""
+    out = []
+    for x in csv_list(s):
+        od, sep, do = x.partition("-")
+        if sep and od.isdigit() and do.isdigit():
+            step = 1 if int(do) >= int(od) else -1
+            out += [str(y) for y in range(int(od), int(do) + step, step)]
+        else:
+            out.append(x)
+    return list(dict.fromkeys(out))
+
+def build_jobs(datasets, svazy, rocniky, kategorie, zvyssich):
+    jobs = []
+    for ds in datasets:
+        for rocnik in rocniky:
+            for svaz in svazy:
+                if ds == "soupisky":
+                    jobs.append(Job(ds, svaz, rocnik))
+                    continue
+                for kat in kategorie:
+                    for zv in zvyssich:
+                        jobs.append(Job(ds, svaz, rocnik, kat, zv))
+    return jobs
+
+def job_output(job):
+    if job.dataset == "soupisky":
+        return scrape_soupisky.out_path(job.svaz, job.rocnik)
+    return scrape_zebricek.out_path(job.svaz, job.rocnik, job.kat, job.zvyss)
+
+class Checkpoint:
+    """
+    stav backfillu: {"done": [úlohy], "failed": {úloha: {"error", "n"}}, "missing": [úlohy]}
+    missing = stránka na STIS neexistuje (NotFound), přeskakuje se stejně jako done
+    přepisuje se po každé úloze (tmp + rename), přerušený běh tak nic neztratí
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+        self.data.setdefault("done", [])
+        self.data.setdefault("failed", {})
+        self.data.setdefault("missing", [])
+        self.done_set = set(self.data["done"]) | set(self.data["missing"])
+
+    def done(self, job):
+        return str(job) in self.done_set
+
+    def failed(self, job):
+        return str(job) in self.data["failed"]
+
+    def mark(self, job, error=None):
+        label = str(job)
+        with self.lock:
+            if isinstance(error, NotFound):
+                self.data["failed"].pop(label, None)
+                if label not in self.done_set:
+                    self.done_set.add(label)
+                    self.data["missing"].append(label)
+            elif error is None:
+                self.data["failed"].pop(label, None)
+                if label not in self.done_set:
+                    self.done_set.add(label)
+                    self.data["done"].append(label)
+            else:
+                f = self.data["failed"].setdefault(label, {"n": 0})
+                f["n"] += 1
+                f["error"] = str(error)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.data, fh, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+    def wrap(self, fn):
+        def run(fx, job):
+            try:
+                fn(fx, job)
+            except NotFound as e:
+                # neexistující kombinace v backfillu není chyba běhu
+                self.mark(job, e)
+                print(f"{job}: neexistuje, přeskočeno")
+                return
+            except Exception as e:
+                self.mark(job, e)
+                raise
+            self.mark(job)
+        return run
+
+def run_job(fx, job):
+    if job.dataset == "soupisky":
+        scrape_soupisky.export_svaz(fx, job.svaz, job.rocnik)
+    elif job.dataset == "zebricek":
+        scrape_zebricek.export_zebricek(fx, job.svaz, job.rocnik, job.kat, job.zvyss)
+    else:
+        raise ValueError(f"neznámý dataset: {job.dataset}")
+
+def parse_args(argv=None):
+    svazy = os.getenv("SVAZY") or ",".join(dict.fromkeys(scrape_soupisky.SVAZY + scrape_zebricek.SVAZY))
+    ap = argparse.ArgumentParser(description="Export soupisek a žebříčků STIS")
+    ap.add_argument("--datasets", default=",".join(DATASETS), help="soupisky,zebricek")
+    ap.add_argument("--svazy", default=svazy, help="seznam, nebo 'all' = všechny svazy (stis_svazy)")
+    ap.add_argument("--discover", action="store_true", help="s --svazy all znovu projít svazy na STIS")
+    ap.add_argument("--merge", action="store_true", help="po exportu spojit per-svaz CSV do data/cr/")
+    ap.add_argument("--rocniky", default=os.getenv("ROCNIK", "2025"), help="seznam i rozsahy: 2016-2025,2012")
+    ap.add_argument("--kategorie", default=os.getenv("KATEGORIE", "s"))
+    ap.add_argument("--zvyssich", default=os.getenv("ZVYSSICH", "ano"))
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--parquet", action="store_true", help="navíc typovaný .parquet (jako PARQUET=1)")
+    ap.add_argument("--sqlite", metavar="CESTA", help="snímky i do SQLite databáze (jako SQLITE=cesta)")
+    ap.add_argument("--diff", action="store_true", help="změny proti minulému CSV do data/changes/ (jako DIFF=1)")
+    ap.add_argument("--join", action="store_true", help="po exportu doplnit soupiskám HracID a STR (stis_join)")
+    ap.add_argument("--backfill", action="store_true",
+                    help="přeskočit úlohy s výstupem na disku / hotové podle --checkpoint")
+    ap.add_argument("--checkpoint", default=os.path.join(OUTDIR, ".backfill.json"), metavar="CESTA")
+    ap.add_argument("--skip-failed", action="store_true", help="s --backfill vynechat i dřív selhané úlohy")
+    a = ap.parse_args(argv)
+    for ds in csv_list(a.datasets):
+        if ds not in DATASETS:
+            ap.error(f"neznámý dataset: {ds}")
+    return a
+
+def jobs_from_args(a):
+    # matice úloh z argumentů (sdílí i stis_daemon enqueue)
+    svazy = stis_svazy.all_svazy(a.discover) if a.svazy == "all" else csv_list(a.svazy)
+    if SHARD_COUNT > 1:
+        mine = stis_svazy.shard(svazy)
+        print(f"shard {SHARD_INDEX}/{SHARD_COUNT}: {len(mine)} z {len(svazy)} svazů")
+        svazy = mine
+    return build_jobs(csv_list(a.datasets), svazy, year_list(a.rocniky),
+                      csv_list(a.kategorie), csv_list(a.zvyssich))
+
+def main(argv=None):
+    a = parse_args(argv)
+    if a.parquet:
+        stis_common.PARQUET = True
+    if a.sqlite:
+        stis_common.SQLITE = a.sqlite
+    if a.diff:
+        stis_common.DIFF = True
+    rocniky = year_list(a.rocniky)
+    jobs = jobs_from_args(a)
+    fn = run_job
+    if a.backfill:
+        ck = Checkpoint(a.checkpoint)
+        total = len(jobs)
+        jobs = [j for j in jobs if not ck.done(j) and not (a.skip_failed and ck.failed(j))
+                and not outputs_exist(job_output(j))]
+        print(f"backfill: {total - len(jobs)} z {total} úloh hotovo nebo vynecháno")
+        fn = ck.wrap(run_job)
+    print(f"{len(jobs)} úloh, {a.workers} vláken")
+    results = run_pool(jobs, fn, workers=a.workers) if jobs else {}
+    if a.join:
+        import stis_join
+        for rocnik in rocniky:
+            stis_join.join(rocnik)
+    if a.merge:
+        for rocnik in rocniky:
+            stis_svazy.merge(rocnik)
+    finish(results)
+
+if __name__ == "__main__":
+    main()
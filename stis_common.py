@@ -0,0 +1,958 @@
+# stis_common.py
+# Společné pro oba scrapery: pomocné funkce, zdroj stránek (fetch engine) a souběžné zpracování.
+#   FETCH=auto    – HTTP klient (requests + lxml), prohlížeč jen když tabulka chybí / potřebuje JS
+#   FETCH=http    – jen HTTP, bez Chromia
+#   FETCH=browser – jen Playwright (původní chování)
+#   WORKERS       – kolik svazů běží současně
+#   RATE_MS       – minimální rozestup požadavků na jeden host (všechna vlákna dohromady)
+#   INCREMENTAL=1 – přeskočí nezměněné stránky (ETag/Last-Modified, hash tabulky v STATE_FILE)
+#   RETRY_BUDGET_S – celkový čas na pokusy o jednu stránku v prohlížeči
+#   BLOCK_TYPES   – typy zdrojů, které prohlížeč nestahuje ("" = nic neblokovat)
+#   ALLOW_HOSTS   – cizí domény, ze kterých se smí stahovat (jQuery/DataTables z CDN; "*" = všechny)
+#   SESSION_FILE  – uložené cookies (formát storage_state Playwrightu), sdílí HTTP i prohlížeč
+#   SESSION_TTL_H – jak dlouho (h) se uložená session bere za platnou bez nového warmupu
+#   PARQUET=1     – navíc typovaný .parquet vedle každého CSV (stis_parquet, vyžaduje pyarrow)
+#   SQLITE        – cesta k SQLite databázi se snímky žebříčků a soupisek (stis_sqlite; "" = vypnuto)
+#   DIFF=1        – změny proti předchozímu CSV do data/changes/ (stis_diff)
+#   STIS_BASE     – adresa serveru (bench/ ji přesměruje na lokální kopii stránek)
+#   SHARD_INDEX / SHARD_COUNT – tento proces zpracuje jen svazy svého shardu (stis_svazy.shard);
+#                   stav INCREMENTAL a report mají příponu shardu, procesy si je nepřepisují
+#   REPORT_FILE   – JSON s časy fází a počítadly po úlohách (výchozí data/debug/run_report.json)
+#   TRACE=1       – navíc časová osa fází (trace_events.json pro Perfetto / chrome://tracing)
+#                   a trace Playwrightu (pw_trace_*.zip, otevře `playwright show-trace`)
+#   DEBUG_SHOTS   – screenshoty neúspěšných pokusů: last (jen poslední pokus, výchozí) | all | none
+#   DEBUG_FULL_PAGE=1 – screenshot celé stránky místo viewportu (u dlouhých žebříčků sekundy)
+#   DEBUG_HTML_KB – HTML pokusu se ořízne na tolik KB (výchozí 2048)
+#   DEBUG_MAX_MB  – kolik MB debug artefaktů smí zapsat jedna úloha, další se zahodí (výchozí 100)
+
+import os, re, csv, time, json, queue, random, pathlib, hashlib, threading, unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    import lxml.html
+except ImportError:                                # bez nich zbývá jen prohlížeč
+    requests = None
+
+try:
+    from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+except ImportError:                                # HTTP režim Chromium nepotřebuje
+    sync_playwright = None
+    class PWTimeout(Exception):
+        pass
+
+BASE  = os.getenv("STIS_BASE", "https://stis.ping-pong.cz").rstrip("/")
+OUTDIR  = "data"
+DEBUG   = os.path.join(OUTDIR, "debug")
+FETCH = os.getenv("FETCH", "auto")                 # "auto" / "http" / "browser"
+WORKERS = int(os.getenv("WORKERS", "4"))
+RATE_MS = int(os.getenv("RATE_MS", "300"))
+INCREMENTAL = os.getenv("INCREMENTAL", "0") == "1"
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_SUFFIX = f".{SHARD_INDEX}of{SHARD_COUNT}" if SHARD_COUNT > 1 else ""
+STATE_FILE  = os.getenv("STATE_FILE", os.path.join("data", f".state{SHARD_SUFFIX}.json"))
+PARQUET     = os.getenv("PARQUET", "0") == "1"
+SQLITE      = os.getenv("SQLITE", "")
+DIFF        = os.getenv("DIFF", "0") == "1"
+RETRY_BUDGET_S = float(os.getenv("RETRY_BUDGET_S", "240"))
+BLOCK_TYPES = {t.strip() for t in os.getenv("BLOCK_TYPES", "image,font,stylesheet,media").split(",") if t.strip()}
+SESSION_FILE  = os.getenv("SESSION_FILE", os.path.join("data", ".session.json"))
+SESSION_TTL_H = float(os.getenv("SESSION_TTL_H", "12"))
+ALLOW_HOSTS = [h.strip() for h in os.getenv(
+    "ALLOW_HOSTS", "code.jquery.com,cdn.datatables.net,cdnjs.cloudflare.com,cdn.jsdelivr.net"
+).split(",") if h.strip()]
+UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+      "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+REPORT_FILE = os.getenv("REPORT_FILE", os.path.join(DEBUG, f"run_report{SHARD_SUFFIX}.json"))
+TRACE   = os.getenv("TRACE", "0") == "1"
+DEBUG_SHOTS     = os.getenv("DEBUG_SHOTS", "last")          # "last" / "all" / "none"
+DEBUG_FULL_PAGE = os.getenv("DEBUG_FULL_PAGE", "0") == "1"
+DEBUG_HTML_KB   = int(os.getenv("DEBUG_HTML_KB", "2048"))
+DEBUG_MAX_MB    = int(os.getenv("DEBUG_MAX_MB", "100"))
+
+pathlib.Path(OUTDIR).mkdir(parents=True, exist_ok=True)
+pathlib.Path(DEBUG).mkdir(parents=True, exist_ok=True)
+
+class Job(NamedTuple):
+    """jedna úloha z matice dataset × svaz × ročník × kategorie (kategorie jen pro žebříček)"""
+    dataset: str            # "soupisky" / "zebricek"
+    svaz: str
+    rocnik: str
+    kat: str = ""
+    zvyss: str = ""
+
+    def __str__(self):
+        if self.dataset == "zebricek":
+            return f"zebricek {self.svaz} {self.rocnik} kat-{self.kat} zvyssich-{self.zvyss}"
+        return f"{self.dataset} {self.svaz} {self.rocnik}"
+
+# ===== měření běhu =====
+class Metrics:
+    """
+    časy fází (stage) a počítadla (count) po úlohách – úlohu vlákna nastavuje run_pool,
+    co běží mimo úlohu, jde pod "-". Fáze se mohou vnořovat (warmup obsahuje svoje goto),
+    časy jsou tedy včetně vnořených. save() zapíše REPORT_FILE, s TRACE=1 i časovou osu.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.local = threading.local()
+        self.jobs = {}
+        self.totals = {"stages": {}, "counters": {}}      # za celý proces (v daemonu i přes opakované úlohy)
+        self.spans = []
+        self.started = time.time()
+        self.t0 = time.monotonic()
+
+    def label(self):
+        # úloha aktuálního vlákna (run_pool / stis_daemon), mimo úlohu "-"
+        return getattr(self.local, "job", None) or "-"
+
+    def _job(self):
+        label = self.label()
+        j = self.jobs.get(label)
+        if j is None:
+            j = self.jobs[label] = {"stages": {}, "counters": {}}
+        return j
+
+    def start_job(self, label):
+        # opakovaná úloha (stis_daemon) začíná s čistými počítadly, totals běží dál
+        self.local.job = label
+        with self.lock:
+            self.jobs[label] = {"stages": {}, "counters": {}, "start": time.monotonic()}
+
+    def end_job(self, error=None):
+        with self.lock:
+            j = self._job()
+            j["s"] = round(time.monotonic() - j.pop("start"), 3)
+            j["error"] = str(error) if error else None
+        self.local.job = None
+
+    def count(self, name, n=1):
+        with self.lock:
+            for c in (self._job()["counters"], self.totals["counters"]):
+                c[name] = c.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name):
+        t = time.monotonic()
+        try:
+            yield
+        finally:
+            dt = time.monotonic() - t
+            with self.lock:
+                for stages in (self._job()["stages"], self.totals["stages"]):
+                    st = stages.setdefault(name, {"ms": 0.0, "n": 0})
+                    st["ms"] += dt * 1000
+                    st["n"] += 1
+                if TRACE:
+                    self.spans.append({"name": name, "cat": getattr(self.local, "job", None) or "-",
+                                       "ph": "X", "pid": 1, "tid": threading.get_ident(),
+                                       "ts": int((t - self.t0) * 1e6), "dur": int(dt * 1e6)})
+
+    def report(self):
+        with self.lock:
+            jobs, totals = json.loads(json.dumps([self.jobs, self.totals]))
+        for j in list(jobs.values()) + [totals]:
+            for st in j["stages"].values():
+                st["ms"] = round(st["ms"], 1)
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "duration_s": round(time.monotonic() - self.t0, 3),
+            "fetch": FETCH, "workers": WORKERS, "rate_ms": RATE_MS,
+            "totals": totals, "jobs": jobs,
+        }
+
+    def save(self, path=REPORT_FILE):
+        # run_pool ukládá po každé úloze – i zrušený běh (concurrency) nechá report
+        with self.save_lock:
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+            if TRACE:
+                with self.lock:
+                    spans = list(self.spans)
+                with open(os.path.join(DEBUG, f"trace_events{SHARD_SUFFIX}.json"), "w", encoding="utf-8") as f:
+                    json.dump({"traceEvents": spans}, f)
+
+METRICS = Metrics()
+stage = METRICS.stage
+
+# Page/ElementHandle obalené tak, že každé volání metody se započte jako jedno volání
+# Playwrightu (playwright_calls). Argumenty se před voláním rozbalí, vrácené handly obalí.
+PW_WRAPPED = {"Page", "Frame", "ElementHandle", "JSHandle", "Locator"}
+
+def _pw_raw(v):
+    if isinstance(v, PwCounted):
+        return v._obj
+    if isinstance(v, (list, tuple)):
+        return type(v)(_pw_raw(x) for x in v)
+    if isinstance(v, dict):
+        return {k: _pw_raw(x) for k, x in v.items()}
+    return v
+
+def _pw_wrap(v):
+    if isinstance(v, list):
+        return [_pw_wrap(x) for x in v]
+    return PwCounted(v) if type(v).__name__ in PW_WRAPPED else v
+
+class PwCounted:
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kw):
+            METRICS.count("playwright_calls")
+            return _pw_wrap(attr(*_pw_raw(args), **_pw_raw(kw)))
+        return call
+
+# ===== pomocné funkce =====
+def utc_stamp():
+    # čas snímku / změn: ISO UTC s milisekundami – dva běhy téže úlohy v daemonu se neslijí
+    t = time.time()
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t)) + f".{int(t * 1000) % 1000:03d}Z"
+
+# celá tabulka jedním voláním page.evaluate (místo dotazu na každou buňku):
+# řádek = [sekce (thead/tbody/tfoot), texty buněk, odkazy [[text, href], ...]]
+TABLE_JS = """(t) => Array.from(t.querySelectorAll('tr')).map(tr => [
+    tr.parentElement ? tr.parentElement.tagName.toLowerCase() : '',
+    Array.from(tr.querySelectorAll('td, th')).map(c => (c.innerText || '').trim()),
+    Array.from(tr.querySelectorAll('a')).map(a => [(a.innerText || '').trim(), a.getAttribute('href') || ''])
+])"""
+
+def table_rows(tbl):
+    with stage("extract"):
+        return tbl.evaluate(TABLE_JS) or []
+
+YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+WS_RE   = re.compile(r"\s+")
+
+def stripdia(s: str) -> str:
+    return unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode("ascii")
+
+@lru_cache(maxsize=65536)
+def normcmp(s: str) -> str:
+    # pro porovnávání textů (jméno/oddíl vs. text odkazu, klíče ve stis_join a stis_sqlite);
+    # jména a oddíly se opakují, takže NFKD převod se počítá jen jednou na text
+    t = stripdia(s or "").lower()
+    t = WS_RE.sub(" ", t).strip()
+    return t
+
+def warmup(page):
+    # získat session cookie, ale nečekat na "networkidle" (na STIS často nikdy nenastane)
+    with stage("warmup"):
+        page.set_extra_http_headers({"Accept-Language": "cs,en;q=0.8"})
+        page.set_default_timeout(45000)
+
+        # stačí DOMContentLoaded; networkidle vynecháme
+        goto(page, BASE + "/", wait_until="domcontentloaded", timeout=45000)
+        try:
+            # lehké dovyčkání na onload, ale krátké a tolerantní
+            page.wait_for_load_state("load", timeout=5000)
+        except:
+            pass
+
+        # nechat doběhnout kratší skripty
+        page.wait_for_timeout(400)
+
+# ===== debug při neúspěchu =====
+class DebugWriter:
+    """
+    zapisuje debug artefakty ve vlastním vlákně – pokus ve smyčce jen předá bajty a jede dál.
+    Rozpočet DEBUG_MAX_MB i deduplikace podle obsahu (sha1; opakované pokusy často vrací
+    totéž) jsou po úlohách – souběžné úlohy v run_pool / stis_daemon si je nesdílí.
+    end_job() stav úlohy zahodí, až se zapíše vše, co úloha předala.
+    """
+
+    def __init__(self, limit_mb=DEBUG_MAX_MB):
+        self.q = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.limit = limit_mb * 1024 * 1024
+        self.jobs = {}                  # úloha -> {"used": bajty, "seen": {sha1}}, jen ve vlákně zápisu
+        self.stats = {"written": 0, "bytes": 0, "dupes": 0, "dropped": 0}
+
+    def put(self, job, name, data):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+                self.thread.start()
+        self.q.put((job, name, data))
+
+    def end_job(self, job):
+        # přes frontu – artefakty úlohy, které ještě čekají, se počítají do jejího rozpočtu
+        if self.thread is not None:
+            self.q.put((job, None, None))
+
+    def _run(self):
+        while True:
+            job, name, data = self.q.get()
+            try:
+                if name is None:
+                    self.jobs.pop(job, None)
+                else:
+                    self._write(job, name, data)
+            except OSError as e:
+                print(f"debug {name}: {e}")
+            finally:
+                self.q.task_done()
+
+    def _write(self, job, name, data):
+        st = self.stats
+        js = self.jobs.setdefault(job, {"used": 0, "seen": set()})
+        h = hashlib.sha1(data).digest()
+        if h in js["seen"]:
+            st["dupes"] += 1
+            return
+        if js["used"] + len(data) > self.limit:
+            st["dropped"] += 1
+            return
+        js["seen"].add(h)
+        path = os.path.join(DEBUG, name)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        js["used"] += len(data)
+        st["written"] += 1
+        st["bytes"] += len(data)
+
+    def flush(self):
+        # konec běhu: počkat na frontu (vlákno je daemon, jinak by se poslední soubory ztratily)
+        if self.thread is None:
+            return
+        self.q.join()
+        st = self.stats
+        print(f"debug: {st['written']} souborů ({st['bytes'] // 1024} KiB)"
+              + (f", {st['dupes']} duplicit" if st["dupes"] else "")
+              + (f", {st['dropped']} nad limit DEBUG_MAX_MB" if st["dropped"] else "")
+              + f" -> {DEBUG}")
+
+DEBUG_WRITER = DebugWriter()
+
+class FailureCapture:
+    """
+    debug neúspěšných pokusů o jednu stránku: HTML každého pokusu (oříznuté na DEBUG_HTML_KB),
+    screenshot podle DEBUG_SHOTS – "last" až po posledním pokusu (final), "all" po každém.
+    Na stránce se jen vezmou bajty, zápis dělá DEBUG_WRITER pod rozpočtem úlohy vlákna
+    (stejný štítek jako METRICS, run_pool / stis_daemon ho po úloze uvolní).
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.job = METRICS.label()
+        self.last = 0
+
+    def attempt(self, page, a, status):
+        self.last = a
+        with stage("debug"):
+            try:
+                html = page.content()
+            except Exception:
+                html = None
+            if html is not None:
+                data = html[:DEBUG_HTML_KB * 1024].encode("utf-8")
+                METRICS.count("debug_bytes", len(data))
+                DEBUG_WRITER.put(self.job, f"{self.prefix}_attempt{a}_status{status or 0}.html", data)
+            if DEBUG_SHOTS == "all":
+                self.screenshot(page)
+
+    def final(self, page):
+        if DEBUG_SHOTS == "last" and self.last:
+            with stage("debug"):
+                self.screenshot(page)
+
+    def screenshot(self, page):
+        try:
+            data = page.screenshot(full_page=DEBUG_FULL_PAGE)
+        except Exception:
+            return
+        METRICS.count("debug_bytes", len(data))
+        DEBUG_WRITER.put(self.job, f"{self.prefix}_attempt{self.last}.png", data)
+
+# ===== zdvořilost k serveru =====
+class RateLimiter:
+    """rozestup požadavků na jeden host, sdílený všemi vlákny"""
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000.0
+        self.lock = threading.Lock()
+        self.next_at = {}
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at.get(host, 0.0))
+            self.next_at[host] = at + self.interval
+        if at > now:
+            with stage("rate_wait"):
+                time.sleep(at - now)
+
+LIMITER = RateLimiter(RATE_MS)
+
+def goto(page, url, **kw):
+    # page.goto s rate limitem
+    LIMITER.wait(url)
+    with stage("goto"):
+        return page.goto(url, **kw)
+
+# ===== čekání a opakování =====
+# počet řádků se nemění aspoň quietMs -> tabulka je hotová; bez selektoru se počítá
+# nejdelší tbody na stránce (žebříček). Stav si drží window, po navigaci začíná znovu.
+STABLE_JS = """([sel, minRows, quietMs]) => {
+    let n = 0;
+    if (sel) n = document.querySelectorAll(sel).length;
+    else for (const t of document.querySelectorAll('table')) {
+        const tb = t.tBodies && t.tBodies[0];
+        if (tb) n = Math.max(n, tb.rows.length);
+    }
+    const now = performance.now();
+    const s = window.__stisWait || (window.__stisWait = {n: -1, at: now});
+    if (n !== s.n) { s.n = n; s.at = now; return false; }
+    return n >= minRows && now - s.at >= quietMs;
+}"""
+
+def wait_table_stable(page, sel=None, min_rows=1, timeout_ms=20000, quiet_ms=300):
+    """čeká, až se počet řádků ustálí; vrací čekání v ms, None = timeout"""
+    t0 = time.monotonic()
+    try:
+        with stage("wait_rows"):
+            page.wait_for_function(STABLE_JS, arg=[sel, min_rows, quiet_ms],
+                                   polling=100, timeout=timeout_ms)
+    except PWTimeout:
+        return None
+    return int((time.monotonic() - t0) * 1000)
+
+class NotFound(RuntimeError):
+    """
+    kombinace svaz/ročník/kategorie na STIS neexistuje (404/410) – bez prohlížeče a dalších
+    pokusů; stis.py --backfill ji zapíše jako "missing" a příště přeskočí
+    """
+
+GONE = (404, 410)
+
+def backoff(attempt, base=0.5, cap=8.0):
+    # exponenciální s plným jitterem: 0 .. min(cap, base * 2^(a-1)) s
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def retry_sleep(attempt, deadline):
+    """uspí před dalším pokusem; False = rozpočet RETRY_BUDGET_S vyčerpán"""
+    d = backoff(attempt)
+    if time.monotonic() + d >= deadline:
+        return False
+    METRICS.count("retries")
+    with stage("retry_sleep"):
+        time.sleep(d)
+    return True
+
+# ===== session mezi běhy =====
+_session_lock = threading.Lock()
+
+def load_session():
+    # uložený storage_state, pokud je mladší než SESSION_TTL_H; jinak None
+    try:
+        if time.time() - os.path.getmtime(SESSION_FILE) > SESSION_TTL_H * 3600:
+            return None
+        with open(SESSION_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_session(cookies=None, state=None):
+    """uloží storage_state prohlížeče, nebo jen cookies z HTTP (origins z minula zůstanou)"""
+    with _session_lock:
+        if state is None:
+            try:
+                with open(SESSION_FILE, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            state = {"cookies": cookies or [], "origins": state.get("origins", [])}
+        tmp = SESSION_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, SESSION_FILE)
+
+def session_expired(status, final_url, url) -> bool:
+    # STIS při neplatné session odmítne, nebo přesměruje na úvodní stránku
+    if status in (401, 403, 419, 440):
+        return True
+    return urlsplit(final_url).path in ("", "/") and urlsplit(url).path not in ("", "/")
+
+# ===== HTTP =====
+class HttpClient:
+    """keep-alive session (pool spojení) se session cookie jako warmup() v prohlížeči"""
+
+    def __init__(self, timeout=45):
+        self.timeout = timeout
+        self.s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=2)
+        self.s.mount("https://", adapter)
+        self.s.mount("http://", adapter)
+        self.s.headers.update({"User-Agent": UA, "Accept-Language": "cs,en;q=0.8"})
+        self.warm = False
+
+    def warmup(self, force=False):
+        st = None if force else load_session()
+        if force:
+            METRICS.count("session_rewarm")
+        if st:
+            for c in st.get("cookies", []):
+                self.s.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+        else:
+            LIMITER.wait(BASE)
+            with stage("warmup"):
+                self.s.get(BASE + "/", timeout=self.timeout)
+            save_session(cookies=[{
+                "name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+                "expires": c.expires or -1, "httpOnly": c.has_nonstandard_attr("HttpOnly"),
+                "secure": c.secure, "sameSite": "Lax",
+            } for c in self.s.cookies])
+        self.warm = True
+
+    def get(self, url, headers=None):
+        if not self.warm:
+            self.warmup()
+        r = self._get(url, headers)
+        if session_expired(r.status_code, r.url, url):
+            self.warmup(force=True)
+            r = self._get(url, headers)
+        return r
+
+    def _get(self, url, headers):
+        LIMITER.wait(url)
+        with stage("http_get"):
+            r = self.s.get(url, headers=headers, timeout=self.timeout)
+        METRICS.count("http_requests")
+        METRICS.count("bytes_http", len(r.content))
+        return r
+
+    def get_doc(self, url, cond=None):
+        """
+        (status, lxml dokument nebo None, validátory {etag, last_modified})
+        cond = uložené validátory -> podmíněný GET, při 304 dokument None
+        """
+        headers = {}
+        if cond:
+            if cond.get("etag"):
+                headers["If-None-Match"] = cond["etag"]
+            if cond.get("last_modified"):
+                headers["If-Modified-Since"] = cond["last_modified"]
+        r = self.get(url, headers=headers or None)
+        val = {"etag": r.headers.get("ETag", ""), "last_modified": r.headers.get("Last-Modified", "")}
+        if r.status_code != 200 or not r.content:
+            return r.status_code, None, val
+        return r.status_code, parse_html(r), val
+
+    def close(self):
+        self.s.close()
+
+def parse_html(r):
+    # kódování: z hlavičky, jinak z <meta charset> (lxml sám), jinak UTF-8 (ne latin-1 z requests)
+    if "charset=" in r.headers.get("Content-Type", "").lower():
+        enc = r.encoding
+    elif re.search(rb"<meta[^>]+charset", r.content[:4096], re.I):
+        enc = None
+    else:
+        enc = "utf-8"
+    with stage("html_parse"):
+        return lxml.html.fromstring(r.content, parser=lxml.html.HTMLParser(encoding=enc))
+
+def html_text(el) -> str:
+    # přibližně innerText: text_content se sloučenými mezerami
+    return re.sub(r"\s+", " ", el.text_content() or "").strip()
+
+def html_table_rows(tbl):
+    """stejný tvar jako TABLE_JS v prohlížeči: [sekce, texty buněk, odkazy [[text, href], ...]]"""
+    out = []
+    with stage("extract"):
+        for tr in tbl.iter("tr"):
+            p = tr.getparent()
+            kind = p.tag if p is not None else ""
+            if kind == "table":          # prohlížeč by řádky zabalil do implicitního <tbody>
+                kind = "tbody"
+            out.append([
+                kind,
+                [html_text(c) for c in tr.iter("td", "th")],
+                [[html_text(a), a.get("href") or ""] for a in tr.iter("a")],
+            ])
+    return out
+
+def html_find_class(doc, tag, cls):
+    return next((e for e in doc.find_class(cls) if e.tag == tag), None)
+
+# ===== inkrementální běh =====
+def page_digest(h, raw):
+    h.update(json.dumps(raw, ensure_ascii=False).encode("utf-8"))
+
+def payload_hash(pages) -> str:
+    # hash zdrojové tabulky po stránkách – stejný jako průběžný v Export
+    h = hashlib.sha1()
+    for raw in pages:
+        page_digest(h, raw)
+    return h.hexdigest()
+
+class State:
+    """
+    stav po URL mezi běhy: {url: {etag, last_modified, hash}}
+    zapisuje se jen po úspěšném exportu, takže pád nenechá "čerstvý" záznam bez CSV
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.changed = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, url):
+        with self.lock:
+            return dict(self.data.get(url, {}))
+
+    def cond(self, url, outp):
+        # validátory pro podmíněný GET – jen když všechny výstupy existují
+        if not INCREMENTAL or not outputs_exist(outp):
+            return None
+        return self.get(url) or None
+
+    def unchanged(self, url, outp, h):
+        return INCREMENTAL and outputs_exist(outp) and self.get(url).get("hash") == h
+
+    def commit(self, url, label, changed, val=None, h=None):
+        with self.lock:
+            st = self.data.setdefault(url, {})
+            if val:
+                st.update({k: v for k, v in val.items() if v})
+            if h:
+                st["hash"] = h
+            if changed:
+                self.changed.append(label)
+
+    def save(self):
+        if not INCREMENTAL:
+            return
+        with self.lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+
+    def report(self):
+        # vypíše a vyprázdní – v daemonu se volá po každé úloze, seznam tak neroste
+        with self.lock:
+            changed, self.changed = self.changed, []
+        if not INCREMENTAL:
+            return
+        if changed:
+            print("změněno: " + ", ".join(sorted(changed)))
+        else:
+            print("beze změn")
+
+STATE = State()
+
+# ===== výstup =====
+def output_paths(outp):
+    # CSV + volitelné další formáty se stejným jménem
+    paths = [outp]
+    if PARQUET:
+        from stis_parquet import parquet_path
+        paths.append(parquet_path(outp))
+    return paths
+
+def outputs_exist(outp):
+    return all(os.path.exists(p) for p in output_paths(outp))
+
+class CsvSink:
+    """CSV se zapisuje průběžně do <cíl>.tmp; commit() ho atomicky přejmenuje, abort() smaže"""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.f = open(self.tmp, "w", newline="", encoding="utf-8")
+        self.w = csv.writer(self.f, delimiter=";")
+        self.w.writerow(header)
+
+    def write(self, rows):
+        self.w.writerows(rows)
+
+    def commit(self):
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+class Export:
+    """
+    Jeden výstup (CSV, s PARQUET=1 i .parquet, se SQLITE i snímek v databázi, s DIFF=1 i změny). add() zapisuje řádky hned, jak jsou
+    naparsované (stránka po stránce), a průběžně počítá hash zdrojové tabulky. finish() tmp
+    soubory atomicky přejmenuje na cíle, nebo je zahodí, když je tabulka prázdná / stejná
+    jako minule (INCREMENTAL). Výjimka uvnitř `with` tmp zahodí – pád uprostřed stránkování
+    nenechá useknutý výstup.
+    """
+
+    def __init__(self, url, outp, header, job):
+        self.url, self.outp, self.header = url, outp, header
+        self.job = job                             # Job – dataset a svaz/ročník pro další sinky
+        self.label = str(job)
+        self.h = hashlib.sha1()
+        self.sinks = None
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.abort()
+        return False
+
+    def same_as_before(self, pages, val=None):
+        """celá tabulka najednou: stejný hash jako minule -> True, bez parsování i zápisu"""
+        h = payload_hash(pages)
+        if not STATE.unchanged(self.url, self.outp, h):
+            return False
+        print(f"{self.label}: beze změny")
+        STATE.commit(self.url, self.label, False, val, h)
+        return True
+
+    def open_sinks(self):
+        self.sinks = [CsvSink(self.outp, self.header)]
+        if DIFF:                                   # první: čte předchozí CSV před jeho nahrazením
+            from stis_diff import DiffSink
+            self.sinks.insert(0, DiffSink(self.outp, self.job.dataset))
+        if PARQUET:
+            from stis_parquet import ParquetSink
+            self.sinks.append(ParquetSink(self.outp, self.job.dataset))
+        if SQLITE:
+            from stis_sqlite import SqliteSink
+            self.sinks.append(SqliteSink(SQLITE, self.job))
+
+    def add(self, raw, rows):
+        with stage("write"):
+            page_digest(self.h, raw)
+            if rows:
+                if self.sinks is None:
+                    self.open_sinks()
+                for sk in self.sinks:
+                    sk.write(rows)
+                self.count += len(rows)
+
+    def finish(self, val=None):
+        """True = hotovo (zapsáno nebo beze změny), False = žádné řádky"""
+        h = self.h.hexdigest()
+        if not self.count:
+            self.abort()
+            return False
+        if STATE.unchanged(self.url, self.outp, h):
+            self.abort()
+            print(f"{self.label}: beze změny")
+            STATE.commit(self.url, self.label, False, val, h)
+            return True
+        with stage("commit"):
+            for sk in self.sinks:
+                sk.commit()
+        self.sinks = None
+        print(f"{self.label}: {self.count} řádků -> {self.outp}")
+        STATE.commit(self.url, self.label, True, val, h)
+        return True
+
+    def abort(self):
+        for sk in self.sinks or []:
+            sk.abort()
+        self.sinks = None
+
+# ===== blokování zdrojů v prohlížeči =====
+def host_allowed(host):
+    # vlastní doména STIS + ALLOW_HOSTS (včetně subdomén)
+    own = urlsplit(BASE).hostname
+    if "*" in ALLOW_HOSTS:
+        return True
+    return any(host == h or host.endswith("." + h) for h in [own] + ALLOW_HOSTS)
+
+def route_filter(route):
+    # obrázky/fonty/CSS a cizí domény (analytika, reklamy) vůbec nestahovat
+    req = route.request
+    if req.resource_type in BLOCK_TYPES or not host_allowed(urlsplit(req.url).hostname or ""):
+        route.abort()
+    else:
+        route.continue_()
+
+def count_response(resp):
+    # bajty z prohlížeče podle Content-Length (tělo se kvůli měření nečte; chunked se nezapočte)
+    METRICS.count("browser_responses")
+    try:
+        METRICS.count("bytes_browser", int(resp.headers.get("content-length", 0)))
+    except ValueError:
+        pass
+
+# ===== zdroj stránek =====
+class Fetcher:
+    """HTTP klient + líně spuštěný prohlížeč (jen pro fallback)"""
+
+    def __init__(self, mode=FETCH):
+        self.mode = mode
+        self.http = None
+        if mode != "browser":
+            if requests is None:
+                if mode == "http":
+                    raise RuntimeError("FETCH=http vyžaduje balíčky requests a lxml")
+            else:
+                self.http = HttpClient()
+        self._pw = self._browser = self._page = None
+
+    def page(self):
+        if self._page is None:
+            if self.mode == "http":
+                raise RuntimeError("FETCH=http: tabulka vyžaduje prohlížeč")
+            if sync_playwright is None:
+                raise RuntimeError("fallback na prohlížeč vyžaduje balíček playwright")
+            with stage("browser_start"):
+                if self._browser is None:          # po recycle() jen nový kontext
+                    self._pw = sync_playwright().start()
+                    self._browser = self._pw.chromium.launch(
+                        headless=True,
+                        args=["--disable-dev-shm-usage", "--no-sandbox"]
+                    )
+                st = load_session()
+                ctx = self._browser.new_context(
+                    user_agent=UA,
+                    viewport={"width":1366, "height":900},
+                    locale="cs-CZ",
+                    storage_state=st
+                )
+                ctx.set_extra_http_headers({"Accept-Language": "cs,en;q=0.8"})
+                ctx.set_default_timeout(45000)
+                ctx.route("**/*", route_filter)
+                if TRACE:
+                    ctx.tracing.start(screenshots=True, snapshots=True)
+                page = ctx.new_page()
+                page.on("response", count_response)
+                self._page = PwCounted(page)
+            if not st:                             # platná uložená session = bez warmupu
+                self.rewarm()
+        return self._page
+
+    def rewarm(self):
+        warmup(self._page)
+        save_session(state=self._page.context.storage_state())
+
+    def goto(self, url, **kw):
+        # goto s obnovou session, když STIS odpověď ukáže, že vypršela
+        page = self.page()
+        resp = goto(page, url, **kw)
+        if resp and session_expired(resp.status, page.url, url):
+            print(f"session vypršela ({resp.status}), nový warmup")
+            METRICS.count("session_rewarm")
+            self.rewarm()
+            resp = goto(page, url, **kw)
+        return resp
+
+    def _stop_trace(self):
+        if TRACE and self._page is not None:
+            try:
+                self._page.context.tracing.stop(
+                    path=os.path.join(DEBUG, f"pw_trace_{threading.get_ident()}_{int(time.time())}.zip"))
+            except Exception:
+                pass
+
+    def recycle(self):
+        """
+        zavře kontext se stránkou (paměť rendereru); prohlížeč i HTTP spojení běží dál,
+        další page() otevře nový kontext s uloženou session – pro dlouho běžící stis_daemon
+        """
+        if self._page is None:
+            return
+        self._stop_trace()
+        try:
+            save_session(state=self._page.context.storage_state())
+            self._page.context.close()
+        except Exception:
+            pass
+        self._page = None
+
+    def close(self):
+        if self.http:
+            self.http.close()
+        self._stop_trace()
+        if self._browser:
+            self._browser.close()
+        if self._pw:
+            self._pw.stop()
+
+# ===== souběh =====
+def run_pool(items, job, workers=WORKERS):
+    """
+    job(fx, item) pro každou položku, nejvýš `workers` současně.
+    Každé vlákno má vlastní Fetcher (sync API Playwrightu není thread-safe), takže
+    případný fallback běží v odděleném prohlížeči. Chyby se sbírají po položkách –
+    zaseknutý svaz drží jen svoje vlákno, ostatní jedou dál.
+    Vrací {item: None | výjimka}.
+    """
+    q = queue.Queue()
+    for it in items:
+        q.put(it)
+    results = {}
+
+    def worker():
+        fx = Fetcher()
+        try:
+            while True:
+                try:
+                    it = q.get_nowait()
+                except queue.Empty:
+                    return
+                METRICS.start_job(str(it))
+                try:
+                    job(fx, it)
+                    results[it] = None
+                    METRICS.end_job()
+                except Exception as e:
+                    results[it] = e
+                    METRICS.end_job(e)
+                    print(f"{it}: CHYBA – {e}")
+                DEBUG_WRITER.end_job(str(it))
+                METRICS.save()
+        finally:
+            fx.close()
+
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(max(1, min(workers, len(items))))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ok = sum(1 for e in results.values() if e is None)
+    print(f"hotovo {ok}/{len(items)}")
+    return results
+
+def finish(results):
+    # konec běhu: uložit stav a report, ohlásit změny, nenulový exit při chybách
+    DEBUG_WRITER.flush()
+    STATE.save()
+    STATE.report()
+    METRICS.save()
+    print(f"report -> {REPORT_FILE}")
+    failed = [str(it) for it, e in results.items() if e is not None]
+    if failed:
+        raise SystemExit(f"Selhalo: {', '.join(failed)}")
@@ -0,0 +1,271 @@
+# stis_daemon.py
+# Dlouho běžící služba místo studeného startu z cronu: úlohy z lokální fronty (SQLite),
+# Fetcher každého vlákna (HTTP pool, případně Chromium) zůstává teplý mezi úlohami.
+#   python stis_daemon.py serve [--workers N] [--port 8765]
+#   python stis_daemon.py enqueue --datasets zebricek --svazy 420103 --rocniky 2025   (argumenty jako stis.py)
+#   python stis_daemon.py status
+#   curl -X POST localhost:8765/enqueue -d '{"datasets": "soupisky", "svazy": "420103"}'
+#   curl localhost:8765/status
+#
+# Fronta: data/.queue.sqlite (QUEUE_FILE), stav úlohy queued -> running -> done/failed.
+# Stejná úloha se nezařadí dvakrát, dokud čeká nebo běží; po pádu se "running" vrátí do fronty.
+# Recyklace: po RECYCLE_JOBS úlohách vlákno zavře kontext prohlížeče (Fetcher.recycle),
+# když RSS procesu i s Chromiem přesáhne RECYCLE_MB, restartuje celý Fetcher.
+# Stav INCREMENTAL a run report se ukládají po každé úloze, limit DEBUG_MAX_MB platí na úlohu.
+# Výstupní volby (PARQUET, SQLITE, DIFF, INCREMENTAL, FETCH) se nastavují prostředím při startu.
+
+import os, sys, json, time, signal, sqlite3, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import stis
+from stis_common import OUTDIR, WORKERS, METRICS, STATE, DEBUG_WRITER, Fetcher, Job
+
+QUEUE_FILE   = os.getenv("QUEUE_FILE", os.path.join(OUTDIR, ".queue.sqlite"))
+DAEMON_PORT  = int(os.getenv("DAEMON_PORT", "8765"))
+RECYCLE_JOBS = int(os.getenv("RECYCLE_JOBS", "50"))
+RECYCLE_MB   = int(os.getenv("RECYCLE_MB", "1500"))
+POLL_S       = float(os.getenv("POLL_S", "2"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL, svaz TEXT NOT NULL, rocnik TEXT NOT NULL, kat TEXT, zvyss TEXT,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    enqueued_at REAL, started_at REAL, finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+"""
+
+class JobQueue:
+    """fronta v SQLite; jedno spojení pro všechna vlákna (operace jsou krátké), mezi procesy zámky SQLite"""
+
+    def __init__(self, path=QUEUE_FILE):
+        self.lock = threading.Lock()
+        self.con = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(SCHEMA)
+
+    def enqueue(self, jobs):
+        n = 0
+        with self.lock:
+            self.con.execute("BEGIN IMMEDIATE")
+            for j in jobs:
+                dup = self.con.execute(
+                    "SELECT 1 FROM jobs WHERE dataset=? AND svaz=? AND rocnik=? AND kat=? AND zvyss=? "
+                    "AND state IN ('queued', 'running')", tuple(j)).fetchone()
+                if not dup:
+                    self.con.execute("INSERT INTO jobs (dataset, svaz, rocnik, kat, zvyss, enqueued_at) "
+                                     "VALUES (?,?,?,?,?,?)", tuple(j) + (time.time(),))
+                    n += 1
+            self.con.execute("COMMIT")
+        return n
+
+    def claim(self):
+        """(id, Job) nejstarší čekající úlohy, nebo None"""
+        with self.lock:
+            self.con.execute("BEGIN IMMEDIATE")
+            row = self.con.execute("SELECT id, dataset, svaz, rocnik, kat, zvyss FROM jobs "
+                                   "WHERE state='queued' ORDER BY id LIMIT 1").fetchone()
+            if row:
+                self.con.execute("UPDATE jobs SET state='running', started_at=?, attempts=attempts+1 "
+                                 "WHERE id=?", (time.time(), row[0]))
+            self.con.execute("COMMIT")
+        return (row[0], Job(*row[1:])) if row else None
+
+    def finish(self, jid, error=None):
+        with self.lock:
+            self.con.execute("UPDATE jobs SET state=?, error=?, finished_at=? WHERE id=?",
+                             ("failed" if error else "done", str(error) if error else None, time.time(), jid))
+
+    def requeue_running(self):
+        # po pádu služby: rozběhnuté úlohy znovu do fronty
+        with self.lock:
+            return self.con.execute("UPDATE jobs SET state='queued' WHERE state='running'").rowcount
+
+    def counts(self):
+        with self.lock:
+            return dict(self.con.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def recent(self, n=20):
+        with self.lock:
+            rows = self.con.execute(
+                "SELECT dataset, svaz, rocnik, kat, zvyss, state, error, attempts, started_at, finished_at "
+                "FROM jobs WHERE state IN ('done', 'failed') ORDER BY finished_at DESC LIMIT ?", (n,)).fetchall()
+        return [{"job": str(Job(*r[:5])), "state": r[5], "error": r[6], "attempts": r[7],
+                 "s": round(r[9] - r[8], 3) if r[8] and r[9] else None} for r in rows]
+
+def rss_mb():
+    """RSS procesu včetně potomků (Chromium) v MB z /proc; mimo Linux 0 = bez recyklace podle paměti"""
+    try:
+        parent = {}
+        for d in os.listdir("/proc"):
+            if d.isdigit():
+                try:
+                    with open(f"/proc/{d}/stat") as f:
+                        parent[int(d)] = int(f.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    pass
+    except OSError:
+        return 0
+    tree, todo = set(), [os.getpid()]
+    while todo:
+        p = todo.pop()
+        tree.add(p)
+        todo += [c for c, pp in parent.items() if pp == p and c not in tree]
+    pages = 0
+    for p in tree:
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                pages += int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            pass
+    return pages * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+
+class Daemon:
+    def __init__(self, workers=WORKERS, port=DAEMON_PORT):
+        self.q = JobQueue()
+        self.workers = workers
+        self.port = port
+        self.stop = threading.Event()
+        self.started = time.time()
+        self.slots = [{"job": None, "since": None, "done": 0, "recycled": 0, "restarted": 0}
+                      for _ in range(workers)]
+
+    def worker(self, i):
+        slot = self.slots[i]
+        fx = Fetcher()
+        since_recycle = 0
+        try:
+            while not self.stop.is_set():
+                item = self.q.claim()
+                if item is None:
+                    self.stop.wait(POLL_S)
+                    continue
+                jid, job = item
+                slot["job"], slot["since"] = str(job), time.time()
+                METRICS.start_job(str(job))
+                err = None
+                try:
+                    stis.run_job(fx, job)
+                except Exception as e:
+                    err = e
+                    print(f"{job}: CHYBA – {e}")
+                METRICS.end_job(err)
+                DEBUG_WRITER.end_job(str(job))
+                self.q.finish(jid, err)
+                STATE.save()
+                STATE.report()
+                METRICS.save()
+                slot["job"] = slot["since"] = None
+                slot["done"] += 1
+                since_recycle += 1
+                if RECYCLE_MB and rss_mb() > RECYCLE_MB:
+                    print(f"vlákno {i}: RSS nad {RECYCLE_MB} MB, restart prohlížeče")
+                    fx.close()
+                    fx = Fetcher()
+                    slot["restarted"] += 1
+                    since_recycle = 0
+                elif since_recycle >= RECYCLE_JOBS:
+                    fx.recycle()
+                    slot["recycled"] += 1
+                    since_recycle = 0
+        finally:
+            fx.close()
+
+    def status(self):
+        return {
+            "uptime_s": round(time.time() - self.started),
+            "rss_mb": rss_mb(),
+            "queue": self.q.counts(),
+            "workers": [dict(s, since=round(time.time() - s["since"], 1) if s["since"] else None)
+                        for s in self.slots],
+            "recent": self.q.recent(),
+            "totals": METRICS.report()["totals"],
+        }
+
+    def serve(self):
+        n = self.q.requeue_running()
+        if n:
+            print(f"{n} nedokončených úloh vráceno do fronty")
+        threads = [threading.Thread(target=self.worker, args=(i,), daemon=True) for i in range(self.workers)]
+        for t in threads:
+            t.start()
+        srv = ThreadingHTTPServer(("127.0.0.1", self.port), make_handler(self))
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        print(f"stis_daemon: {self.workers} vláken, status na http://127.0.0.1:{self.port}/status")
+
+        def on_signal(*_):
+            self.stop.set()
+        signal.signal(signal.SIGTERM, on_signal)
+        signal.signal(signal.SIGINT, on_signal)
+        while not self.stop.is_set():
+            self.stop.wait(1)
+        print("ukončuji – doběhnou rozpracované úlohy")
+        for t in threads:
+            t.join()
+        DEBUG_WRITER.flush()
+        srv.shutdown()
+
+def args_to_argv(d):
+    # {"datasets": "...", "svazy": "..."} -> ["--datasets", "...", ...] pro stis.parse_args
+    argv = []
+    for k, v in d.items():
+        argv += [f"--{k}", str(v)]
+    return argv
+
+def enqueue(q, argv):
+    return q.enqueue(stis.jobs_from_args(stis.parse_args(argv)))
+
+def make_handler(daemon):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, obj):
+            body = json.dumps(obj, ensure_ascii=False, indent=1).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("", "/status"):
+                self.reply(200, daemon.status())
+            else:
+                self.reply(404, {"error": "neznámá cesta"})
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/enqueue":
+                self.reply(404, {"error": "neznámá cesta"})
+                return
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                d = json.loads(self.rfile.read(n) or b"{}")
+                self.reply(200, {"queued": enqueue(daemon.q, args_to_argv(d))})
+            except SystemExit:              # argparse chyba
+                self.reply(400, {"error": "neplatné argumenty"})
+            except Exception as e:
+                self.reply(400, {"error": str(e)})
+
+        def log_message(self, *a):
+            pass
+    return Handler
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    cmd, rest = (argv[0], argv[1:]) if argv else ("", [])
+    if cmd == "serve":
+        ap = argparse.ArgumentParser(description="stis_daemon serve")
+        ap.add_argument("--workers", type=int, default=WORKERS)
+        ap.add_argument("--port", type=int, default=DAEMON_PORT)
+        a = ap.parse_args(rest)
+        Daemon(a.workers, a.port).serve()
+    elif cmd == "enqueue":
+        print(f"zařazeno {enqueue(JobQueue(), rest)} úloh")
+    elif cmd == "status":
+        q = JobQueue()
+        print(json.dumps({"queue": q.counts(), "recent": q.recent(10)}, ensure_ascii=False, indent=1))
+    else:
+        raise SystemExit("použití: stis_daemon.py serve | enqueue [argumenty stis.py] | status")
+
+if __name__ == "__main__":
+    main()
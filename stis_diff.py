@@ -0,0 +1,139 @@
+# stis_diff.py
+# Změny proti předchozímu snímku – zapíná DIFF=1 / stis.py --diff.
+# Při každém exportu, který tabulku skutečně přepisuje, porovná nové řádky s dosavadním CSV
+# (jeden průchod přes každý, slovníky podle klíče) a zapíše data/changes/<jméno CSV>:
+#
+#   žebříček, klíč HracID (bez ID jméno + rok):
+#     Cas;Zmena;HracID;Příjmení a jméno;Oddil_pred;Oddil_po;Poradi_pred;Poradi_po;STR_pred;STR_po;STR_delta
+#     Zmena: added | removed | transfer (jiný oddíl) | moved (pořadí) | str (jen STR)
+#   soupisky, klíč oddíl + P.č. + jméno:
+#     Cas;Zmena;Příjmení a jméno;Rok.nar.;Oddil_pred;P.č._pred;Oddil_po;P.č._po
+#     Zmena: added | removed | moved (jiné P.č. v družstvu) | transfer (jiné družstvo)
+#
+# Soubor se přepíše při každém přepsání tabulky (stejný hash = žádný export), Cas říká, ze
+# kterého exportu je. Bez změn na úrovni klíčů (jiné odkazy/mezery, nebo běh bez INCREMENTAL)
+# i u prvního snímku zůstane jen hlavička – starou deltu tak nikdo nepoužije podruhé.
+
+import os, csv
+from stis_common import OUTDIR, utc_stamp
+from stis_parquet import to_float
+
+CHANGES_DIR = os.path.join(OUTDIR, "changes")
+
+ZEBRICEK_HEADER = ["Cas", "Zmena", "HracID", "Příjmení a jméno", "Oddil_pred", "Oddil_po",
+                   "Poradi_pred", "Poradi_po", "STR_pred", "STR_po", "STR_delta"]
+SOUPISKY_HEADER = ["Cas", "Zmena", "Příjmení a jméno", "Rok.nar.",
+                   "Oddil_pred", "P.č._pred", "Oddil_po", "P.č._po"]
+
+def zebricek_key(r):
+    return r[9] or (r[1], r[2])
+
+def soupisky_key(r):
+    return (r[0], r[1], r[2])
+
+def str_delta(a, b):
+    x, y = to_float(a), to_float(b)
+    if x is None or y is None or x == y:
+        return ""
+    d = f"{y - x:+.1f}"
+    return (d[:-2] if d.endswith(".0") else d).replace(".", ",")
+
+def diff_zebricek(old, new):
+    out = []
+    for k, n in new.items():
+        o = old.get(k)
+        if o is None:
+            out.append(["added", n[9], n[1], "", n[3], "", n[0], "", n[5], ""])
+            continue
+        if o[3] != n[3]:
+            op = "transfer"
+        elif o[0] != n[0]:
+            op = "moved"
+        elif o[5] != n[5]:
+            op = "str"
+        else:
+            continue
+        out.append([op, n[9], n[1], o[3], n[3], o[0], n[0], o[5], n[5], str_delta(o[5], n[5])])
+    for k, o in old.items():
+        if k not in new:
+            out.append(["removed", o[9], o[1], o[3], "", o[0], "", o[5], "", ""])
+    return out
+
+def diff_soupisky(old, new):
+    removed = [o for k, o in old.items() if k not in new]
+    added = [n for k, n in new.items() if k not in old]
+    # odebraný + přidaný se stejným jménem: v témže družstvu = přeřazení, jinde = přestup
+    by_team = {}
+    for o in removed:
+        by_team.setdefault((o[0], o[2]), []).append(o)
+    out, rest = [], []
+    for n in added:
+        cand = by_team.get((n[0], n[2]))
+        if cand:
+            o = cand.pop(0)
+            out.append(["moved", n[2], n[3], o[0], o[1], n[0], n[1]])
+        else:
+            rest.append(n)
+    left = [o for lst in by_team.values() for o in lst]
+    by_player = {}
+    for o in left:
+        by_player.setdefault((o[2], o[3]), []).append(o)
+    for n in rest:
+        cand = by_player.get((n[2], n[3]))
+        if cand:
+            o = cand.pop(0)
+            out.append(["transfer", n[2], n[3], o[0], o[1], n[0], n[1]])
+        else:
+            out.append(["added", n[2], n[3], "", "", n[0], n[1]])
+    for lst in by_player.values():
+        for o in lst:
+            out.append(["removed", o[2], o[3], o[0], o[1], "", ""])
+    return out
+
+def changes_path(outp):
+    return os.path.join(CHANGES_DIR, os.path.basename(outp))
+
+class DiffSink:
+    """
+    sbírá nové řádky podle klíče; commit() musí proběhnout před CsvSink.commit(),
+    dokud outp ještě obsahuje předchozí snímek (Export ho řadí jako první)
+    """
+
+    def __init__(self, outp, dataset):
+        self.outp = outp
+        self.zebricek = dataset == "zebricek"
+        self.key = zebricek_key if self.zebricek else soupisky_key
+        self.ts = utc_stamp()     # Cas – po exportech, ne po procesu
+        self.new = {}
+
+    def write(self, rows):
+        for r in rows:
+            self.new.setdefault(self.key(r), r)
+
+    def commit(self):
+        header = ZEBRICEK_HEADER if self.zebricek else SOUPISKY_HEADER
+        changes = []
+        if os.path.exists(self.outp):
+            old = {}
+            with open(self.outp, newline="", encoding="utf-8") as f:
+                rd = csv.reader(f, delimiter=";")
+                next(rd, None)
+                for r in rd:
+                    old.setdefault(self.key(r), r)
+            changes = (diff_zebricek if self.zebricek else diff_soupisky)(old, self.new)
+        os.makedirs(CHANGES_DIR, exist_ok=True)
+        path = changes_path(self.outp)
+        with open(path + ".tmp", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(header)
+            w.writerows([self.ts] + c for c in changes)
+        os.replace(path + ".tmp", path)
+        if not changes:
+            return
+        counts = {}
+        for c in changes:
+            counts[c[0]] = counts.get(c[0], 0) + 1
+        print("změny: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) + f" -> {path}")
+
+    def abort(self):
+        self.new = {}
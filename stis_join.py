@@ -0,0 +1,88 @@
+# stis_join.py
+# Propojení soupisek se žebříčky: ke každému řádku soupisky doplní HracID a STR.
+#   python stis_join.py [ROCNIK]        (nebo stis.py --join po exportu)
+#
+# Index ze všech data/zebricek_*_<ročník>_kat-*.csv: (normcmp jméno, rok narození) -> hráči.
+# Oddíl slouží jen k rozhodnutí mezi více kandidáty – soupiska má název družstva
+# ("Sokol Středokluky A"), žebříček celý název oddílu, takže se porovnávají slova názvu.
+# Jeden průchod přes žebříčky a jeden přes soupisky – lineárně přes všechny svazy.
+#
+# Výstup: data/soupisky_<svaz>_<ročník>_hraci.csv = sloupce soupisky + HracID;STR;Shoda
+#   Shoda: "jmeno+rok" | "oddil" (rozhodl oddíl) | "nejednoznacne" | "nenalezen"
+
+import os, re, csv, sys, glob
+from collections import Counter
+from stis_common import OUTDIR, normcmp
+
+SOUPISKA_RE = re.compile(r"soupisky_(\d+)_(\d{4})\.csv$")
+
+def norm_name(s: str) -> str:
+    # bez poznámek v závorce, např. "Maruniak Dominik (E)"
+    return normcmp(re.sub(r"\([^)]*\)", " ", s or ""))
+
+def club_words(s: str) -> set:
+    # slova názvu oddílu/družstva bez krátkých zkratek a písmene družstva (A, B, ...)
+    return {w for w in re.split(r"[^a-z0-9]+", normcmp(s)) if len(w) > 2}
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f, delimiter=";"))
+    return rows[0], rows[1:]
+
+def build_index(rocnik):
+    """(jméno, rok) -> {HracID: (STR, oddíl)}; hráč z více svazů se počítá jednou"""
+    idx = {}
+    for path in sorted(glob.glob(os.path.join(OUTDIR, f"zebricek_*_{rocnik}_kat-*.csv"))):
+        hdr, rows = read_csv(path)
+        c = {h: i for i, h in enumerate(hdr)}
+        for r in rows:
+            hid = r[c["HracID"]]
+            if not hid:
+                continue
+            key = (norm_name(r[c["Příjmení a jméno"]]), r[c["Rok.nar."]].strip())
+            idx.setdefault(key, {}).setdefault(hid, (r[c["STR"]], r[c["Oddil"]]))
+    return idx
+
+def match(idx, jmeno, rok, oddil):
+    """(HracID, STR, Shoda)"""
+    cands = idx.get((norm_name(jmeno), rok.strip()))
+    if not cands:
+        return "", "", "nenalezen"
+    if len(cands) == 1:
+        hid, (str_v, _) = next(iter(cands.items()))
+        return hid, str_v, "jmeno+rok"
+    words = club_words(oddil)
+    scored = sorted(((len(words & club_words(o)), hid, str_v) for hid, (str_v, o) in cands.items()),
+                    reverse=True)
+    if scored[0][0] > 0 and scored[0][0] > scored[1][0]:
+        return scored[0][1], scored[0][2], "oddil"
+    return "", "", "nejednoznacne"
+
+def join(rocnik):
+    idx = build_index(rocnik)
+    total = Counter()
+    for path in sorted(glob.glob(os.path.join(OUTDIR, f"soupisky_*_{rocnik}.csv"))):
+        m = SOUPISKA_RE.search(os.path.basename(path))
+        if not m:
+            continue
+        hdr, rows = read_csv(path)
+        outp = os.path.join(OUTDIR, f"soupisky_{m.group(1)}_{rocnik}_hraci.csv")
+        stats = Counter()
+        with open(outp + ".tmp", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(hdr + ["HracID", "STR", "Shoda"])
+            for r in rows:
+                oddil, _, jmeno, rok = r[:4]
+                hid, str_v, shoda = match(idx, jmeno, rok, oddil)
+                stats[shoda] += 1
+                w.writerow(r + [hid, str_v, shoda])
+        os.replace(outp + ".tmp", outp)
+        total.update(stats)
+        print(f"{m.group(1)}: {sum(stats.values())} řádků, " +
+              ", ".join(f"{k} {v}" for k, v in sorted(stats.items())) + f" -> {outp}")
+    if total:
+        print("celkem: " + ", ".join(f"{k} {v}" for k, v in sorted(total.items())))
+    return total
+
+if __name__ == "__main__":
+    join(sys.argv[1] if len(sys.argv) > 1 else os.getenv("ROCNIK", "2025"))
@@ -0,0 +1,114 @@
+# stis_parquet.py
+# Typovaný sloupcový výstup (Parquet) vedle středníkových CSV – zapíná PARQUET=1 / stis.py --parquet.
+# Vzniká ze stejných řádků, jaké dávají parse_table / parse_page_rows, jen s převedenými typy:
+#   STR stabil "2187,7"           -> 2187.7
+#   Zápasy "73 (70:3)"            -> zapasy 73, vyhry 70, prohry 3
+#   "kraj. muži 21.-30.N"         -> umisteni_kat "kraj. muži", od 21, do 30, priznak "N"
+# Vyžaduje balíček pyarrow (v requirements.txt jen jako volitelný).
+
+import os, re
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# ===== převody =====
+def to_int(s):
+    m = re.fullmatch(r"\s*(-?\d+)\.?\s*", s or "")
+    return int(m.group(1)) if m else None
+
+def to_float(s):
+    # české desetinné číslo: "2187,7"
+    t = (s or "").strip().replace(",", ".")
+    return float(t) if re.fullmatch(r"-?\d+(?:\.\d+)?", t) else None
+
+def split_zapasy(s):
+    """'73 (70:3)' -> (73, 70, 3); chybějící části None"""
+    m = re.match(r"\s*(\d+)\s*(?:\(\s*(\d+)\s*:\s*(\d+)\s*\))?", s or "")
+    if not m:
+        return None, None, None
+    return tuple(int(x) if x is not None else None for x in m.groups())
+
+UMISTENI = re.compile(r"(?<!\w)(\d+(?:,\d+)?)\s*\.?(?:\s*[-–]\s*(\d+(?:,\d+)?)\.?)?")
+
+def split_umisteni(s):
+    """
+    'kraj. muži 14.'         -> ('kraj. muži', 14.0, 14.0, '')
+    'kraj. muži 21.-30.N'    -> ('kraj. muži', 21.0, 30.0, 'N')
+    'reg. muži 35,5'         -> ('reg. muži', 35.5, 35.5, '')   (dělené místo)
+    'kraj. muži 401-450, N'  -> ('kraj. muži', 401.0, 450.0, 'N')
+    'kraj. muži nez.'        -> ('kraj. muži', None, None, 'nez.')
+    """
+    t = (s or "").strip()
+    m = UMISTENI.search(t)
+    if not m:
+        # bez čísla: poslední slovo je příznak (N / nez. / nezařazen), zbytek kategorie
+        kat, _, flag = t.rpartition(" ")
+        return kat.strip(), None, None, flag
+    od = to_float(m.group(1))
+    do = to_float(m.group(2)) if m.group(2) else od
+    return t[:m.start()].strip(), od, do, t[m.end():].strip(" .,-–")
+
+# ===== schémata: (sloupce, převod řádku CSV -> typovaný řádek) =====
+def soupisky_row(r):
+    oddil, poradi, jmeno, rok, umisteni, soutez = r
+    kat, od, do, flag = split_umisteni(umisteni)
+    return [oddil, to_int(poradi), jmeno, to_int(rok), umisteni, kat, od, do, flag, soutez]
+
+def zebricek_row(r):
+    (poradi, jmeno, rok, oddil, zapasy, str_v, str_s, str_pm,
+     hrac_url, hrac_id, oddil_url, oddil_id, svaz, kat, rocnik) = r
+    z, v, p = split_zapasy(zapasy)
+    return [to_int(poradi), jmeno, to_int(rok), oddil, z, v, p,
+            to_float(str_v), to_float(str_s), to_float(str_pm),
+            hrac_url, to_int(hrac_id), oddil_url, to_int(oddil_id), svaz, kat, to_int(rocnik)]
+
+def schemas():
+    s, i, f = pa.string(), pa.int64(), pa.float64()
+    return {
+        "soupisky": (pa.schema([
+            ("oddil", s), ("poradi", i), ("jmeno", s), ("rok_nar", i),
+            ("umisteni", s), ("umisteni_kat", s), ("umisteni_od", f), ("umisteni_do", f),
+            ("umisteni_priznak", s), ("soutez", s),
+        ]), soupisky_row),
+        "zebricek": (pa.schema([
+            ("poradi", i), ("jmeno", s), ("rok_nar", i), ("oddil", s),
+            ("zapasy", i), ("vyhry", i), ("prohry", i),
+            ("str", f), ("str_stabil", f), ("str_pm", f),
+            ("hrac_url", s), ("hrac_id", i), ("oddil_url", s), ("oddil_id", i),
+            ("svaz", s), ("kategorie", s), ("rocnik", i),
+        ]), zebricek_row),
+    }
+
+def parquet_path(outp):
+    return os.path.splitext(outp)[0] + ".parquet"
+
+class ParquetSink:
+    """jako CsvSink: po dávkách do <cíl>.tmp (row group na dávku), commit() = atomické přejmenování"""
+
+    def __init__(self, outp, dataset):
+        if pa is None:
+            raise RuntimeError("PARQUET=1 vyžaduje balíček pyarrow")
+        self.path = parquet_path(outp)
+        self.tmp = self.path + ".tmp"
+        self.schema, self.convert = schemas()[dataset]
+        self.w = pq.ParquetWriter(self.tmp, self.schema, compression="zstd")
+
+    def write(self, rows):
+        typed = [self.convert(r) for r in rows]
+        cols = list(zip(*typed)) if typed else [[] for _ in self.schema]
+        self.w.write_table(pa.Table.from_arrays(
+            [pa.array(c, type=fld.type) for c, fld in zip(cols, self.schema)], schema=self.schema))
+
+    def commit(self):
+        self.w.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self.w.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
@@ -0,0 +1,135 @@
+# stis_sqlite.py
+# Lokální SQLite úložiště se snímky žebříčků a soupisek – zapíná SQLITE=cesta / stis.py --sqlite.
+# Každý export = jeden snímek (ts = začátek exportu) v jedné transakci při commitu; při chybě
+# exportu se nezapíše nic. Dlouho běžící stis_daemon tak má u každého běhu úlohy vlastní ts.
+# Hráči a oddíly se klíčují přes HracID / OddilID z extract_id_from_url.
+#
+# Typické dotazy:
+#   -- vývoj STR hráče
+#   SELECT ts, svaz, kategorie, poradi, str, str_stabil FROM zebricek WHERE hrac_id = ? ORDER BY ts;
+#   -- všechny soupisky oddílu: družstvo začíná názvem oddílu; :k = oddil_key(název), rozsah jde přes index
+#   SELECT DISTINCT svaz, rocnik, ts, oddil FROM soupisky
+#    WHERE oddil_key >= :k AND oddil_key < :k || char(127);
+#   -- poslední snímek žebříčku svazu (ts je po exportech, tedy po ročníku a kategorii)
+#   SELECT * FROM zebricek WHERE svaz = :s AND rocnik = :r AND kategorie = :k AND ts =
+#     (SELECT MAX(ts) FROM zebricek WHERE svaz = :s AND rocnik = :r AND kategorie = :k);
+#
+# S INCREMENTAL=1 vzniká snímek jen tehdy, když se tabulka změnila.
+
+import sqlite3, threading
+from stis_parquet import soupisky_row, zebricek_row
+from stis_common import utc_stamp, normcmp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hraci (
+    hrac_id  INTEGER PRIMARY KEY,
+    jmeno    TEXT,
+    rok_nar  INTEGER,
+    url      TEXT
+);
+CREATE TABLE IF NOT EXISTS oddily (
+    oddil_id INTEGER PRIMARY KEY,
+    nazev    TEXT,
+    url      TEXT
+);
+CREATE TABLE IF NOT EXISTS zebricek (
+    ts TEXT NOT NULL, svaz TEXT NOT NULL, rocnik INTEGER NOT NULL, kategorie TEXT NOT NULL,
+    zvyssich TEXT,
+    poradi INTEGER, hrac_id INTEGER, jmeno TEXT, rok_nar INTEGER, oddil_id INTEGER, oddil TEXT,
+    zapasy INTEGER, vyhry INTEGER, prohry INTEGER,
+    str REAL, str_stabil REAL, str_pm REAL
+);
+CREATE INDEX IF NOT EXISTS zebricek_hrac  ON zebricek (hrac_id, ts);
+CREATE INDEX IF NOT EXISTS zebricek_oddil ON zebricek (oddil_id, ts);
+CREATE INDEX IF NOT EXISTS zebricek_snap  ON zebricek (svaz, rocnik, kategorie, ts);
+CREATE TABLE IF NOT EXISTS soupisky (
+    ts TEXT NOT NULL, svaz TEXT NOT NULL, rocnik INTEGER NOT NULL,
+    oddil TEXT, poradi INTEGER, jmeno TEXT, rok_nar INTEGER,
+    umisteni TEXT, umisteni_kat TEXT, umisteni_od REAL, umisteni_do REAL, umisteni_priznak TEXT,
+    soutez TEXT,
+    oddil_key TEXT
+);
+CREATE INDEX IF NOT EXISTS soupisky_oddil ON soupisky (oddil, ts);
+CREATE INDEX IF NOT EXISTS soupisky_hrac  ON soupisky (jmeno, rok_nar);
+CREATE INDEX IF NOT EXISTS soupisky_snap  ON soupisky (svaz, rocnik, ts);
+"""
+
+# až po doplnění sloupce do starších databází
+INDEXES = """
+CREATE INDEX IF NOT EXISTS soupisky_key   ON soupisky (oddil_key, ts);
+"""
+
+def oddil_key(nazev):
+    # bez diakritiky, malými písmeny, ASCII – LIKE je bez rozlišení velikosti a index nepoužije
+    return normcmp(nazev or "")
+
+def migrate(con):
+    cols = {r[1] for r in con.execute("PRAGMA table_info(soupisky)")}
+    if "oddil_key" not in cols:
+        con.create_function("oddil_key", 1, oddil_key, deterministic=True)
+        with con:
+            con.execute("ALTER TABLE soupisky ADD COLUMN oddil_key TEXT")
+            con.execute("UPDATE soupisky SET oddil_key = oddil_key(oddil)")
+
+_init_lock = threading.Lock()
+_initialized = set()
+
+def connect(path):
+    # vlastní spojení na vlákno/export; WAL + timeout, ať souběžné exporty na sebe počkají
+    con = sqlite3.connect(path, timeout=60)
+    con.execute("PRAGMA journal_mode=WAL")
+    with _init_lock:
+        if path not in _initialized:
+            con.executescript(SCHEMA)
+            migrate(con)
+            con.executescript(INDEXES)
+            _initialized.add(path)
+    return con
+
+class SqliteSink:
+    """
+    jako CsvSink, ale řádky se drží v paměti a zapíší se až v commit() v jedné krátké
+    transakci – zápisový zámek databáze nedrží export po celou dobu stránkování
+    """
+
+    def __init__(self, path, job):
+        self.path = path
+        self.job = job
+        self.ts = utc_stamp()
+        self.rows = []
+
+    def write(self, rows):
+        if self.job.dataset == "soupisky":
+            self.rows += [soupisky_row(r) for r in rows]
+        else:
+            self.rows += [zebricek_row(r) for r in rows]
+
+    def commit(self):
+        j = self.job
+        con = connect(self.path)
+        try:
+            with con:
+                if j.dataset == "soupisky":
+                    con.executemany(
+                        "INSERT INTO soupisky VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        [[self.ts, j.svaz, int(j.rocnik)] + r + [oddil_key(r[0])] for r in self.rows])
+                else:
+                    typed = self.rows
+                    con.executemany(
+                        "INSERT INTO hraci VALUES (?,?,?,?) ON CONFLICT(hrac_id) DO UPDATE SET "
+                        "jmeno=excluded.jmeno, rok_nar=excluded.rok_nar, url=excluded.url",
+                        [(t[11], t[1], t[2], t[10]) for t in typed if t[11] is not None])
+                    con.executemany(
+                        "INSERT INTO oddily VALUES (?,?,?) ON CONFLICT(oddil_id) DO UPDATE SET "
+                        "nazev=excluded.nazev, url=excluded.url",
+                        [(t[13], t[3], t[12]) for t in typed if t[13] is not None])
+                    con.executemany(
+                        "INSERT INTO zebricek VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        [(self.ts, j.svaz, int(j.rocnik), t[15], j.zvyss,
+                          t[0], t[11], t[1], t[2], t[13], t[3], t[4], t[5], t[6], t[7], t[8], t[9]) for t in typed])
+        finally:
+            con.close()
+        self.rows = []
+
+    def abort(self):
+        self.rows = []
@@ -0,0 +1,153 @@
+# stis_svazy.py
+# Seznam svazů celé ČR místo ručně doplňovaného SVAZY, rozdělení na shardy a sloučení výstupů.
+#   python stis_svazy.py discover          -> data/svazy.json {id: název}
+#   python stis_svazy.py shard             -> svazy shardu SHARD_INDEX/SHARD_COUNT
+#   python stis_svazy.py merge [ROCNIK]    -> data/cr/soupisky_<r>.csv, data/cr/zebricek_<r>_kat-<k>.csv
+#
+# discover: od úvodní stránky po odkazech .../svaz-<id>/...; z každého svazu se otevře jen
+# jedna stránka (tam jsou odkazy na podřízené svazy), takže počet požadavků ~ počet svazů.
+# Profily hráčů/oddílů/utkání (také nesou svaz-<id>) se neprocházejí.
+#
+# shard: svaz patří do shardu crc32(id) % SHARD_COUNT – nezávisí na pořadí ani na ostatních
+# svazech, přidaný svaz nepřesune ty stávající. Celý svaz (soupisky i všechny žebříčky)
+# je vždy v jednom shardu.
+#
+# merge: per-svaz CSV ze všech shardů (po stažení do data/) se spojí do jednoho souboru
+# na dataset a ročník; soupiskám přibude sloupec Svaz.
+
+import os, re, csv, sys, json, glob, time, zlib
+from collections import deque
+from urllib.parse import urlsplit
+from stis_common import BASE, OUTDIR, SHARD_INDEX, SHARD_COUNT, HttpClient, html_text
+
+SVAZY_FILE = os.path.join(OUTDIR, "svazy.json")
+CR_DIR = os.path.join(OUTDIR, "cr")
+MAX_PAGES = int(os.getenv("DISCOVER_PAGES", "500"))
+
+SVAZ_RE = re.compile(r"/svaz-(\d+)")
+SKIP_RE = re.compile(r"/(?:hrac|osoba|oddil|klub|druzstvo|utkani|zapas)-\d", re.I)
+SOUPISKY_RE = re.compile(r"soupisky_(\d+)_(\d{4})\.csv$")
+ZEBRICEK_RE = re.compile(r"zebricek_(\d+)_(\d{4})_kat-([^_.]+)(_zvyssich-[^_.]+)?\.csv$")
+
+# ===== discovery =====
+def discover(http, start=None, max_pages=MAX_PAGES):
+    """{id svazu: název} ze všech odkazů svaz-<id> dosažitelných z úvodní stránky"""
+    host = urlsplit(BASE).netloc
+    q = deque([start or BASE + "/"])
+    queued = set()              # svazy, jejichž stránka už je ve frontě
+    found = {}
+    pages = 0
+    while q and pages < max_pages:
+        url = q.popleft()
+        try:
+            status, doc, _ = http.get_doc(url)
+        except Exception as e:
+            print(f"{url}: {e}")
+            continue
+        pages += 1
+        if doc is None:
+            continue
+        doc.make_links_absolute(url)
+        for a in doc.iter("a"):
+            href = (a.get("href") or "").split("#")[0]
+            u = urlsplit(href)
+            m = SVAZ_RE.search(u.path)
+            if not m or u.netloc != host:
+                continue
+            svaz = m.group(1)
+            name = html_text(a)
+            if not found.get(svaz) and name and not name.isdigit():
+                found[svaz] = name
+            found.setdefault(svaz, "")
+            if svaz not in queued and not SKIP_RE.search(u.path):
+                queued.add(svaz)
+                q.append(href)
+    print(f"discovery: {len(found)} svazů, {pages} stránek" +
+          (" (limit DISCOVER_PAGES)" if q else ""))
+    return found
+
+def save_svazy(found, path=SVAZY_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"discovered": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                   "base": BASE, "svazy": dict(sorted(found.items()))}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def load_svazy(path=SVAZY_FILE):
+    with open(path, encoding="utf-8") as f:
+        return sorted(json.load(f)["svazy"])
+
+def all_svazy(refresh=False):
+    # uložený seznam (stejný pro všechny shardy), jinak discovery
+    if not refresh and os.path.exists(SVAZY_FILE):
+        return load_svazy()
+    http = HttpClient()
+    try:
+        found = discover(http)
+    finally:
+        http.close()
+    if not found:
+        raise RuntimeError("discovery nenašla žádný svaz")
+    save_svazy(found)
+    return sorted(found)
+
+# ===== shardy =====
+def shard(svazy, index=SHARD_INDEX, count=SHARD_COUNT):
+    if not 0 <= index < count:
+        raise ValueError(f"SHARD_INDEX {index} mimo 0..{count - 1}")
+    return [s for s in svazy if zlib.crc32(s.encode("ascii")) % count == index]
+
+# ===== sloučení =====
+def merge(rocnik, outdir=CR_DIR):
+    """per-svaz CSV -> jeden soubor na dataset (a kategorii); vrací {výstup: počet svazů}"""
+    groups = {}
+    for path in sorted(glob.glob(os.path.join(OUTDIR, f"*_{rocnik}*.csv"))):
+        name = os.path.basename(path)
+        m = SOUPISKY_RE.fullmatch(name)
+        if m:
+            groups.setdefault(f"soupisky_{rocnik}.csv", []).append((m.group(1), path))
+            continue
+        m = ZEBRICEK_RE.fullmatch(name)
+        if m:
+            groups.setdefault(f"zebricek_{rocnik}_kat-{m.group(3)}{m.group(4) or ''}.csv", []).append((m.group(1), path))
+    os.makedirs(outdir, exist_ok=True)
+    out = {}
+    for target, parts in sorted(groups.items()):
+        outp = os.path.join(outdir, target)
+        rows = 0
+        header = False
+        with open(outp + ".tmp", "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            for svaz, path in parts:
+                with open(path, newline="", encoding="utf-8") as src:
+                    r = csv.reader(src, delimiter=";")
+                    hdr = next(r, None)
+                    if hdr is None:             # prázdný soubor – hlavička z dalšího
+                        continue
+                    add_svaz = "Svaz" not in hdr
+                    if not header:
+                        w.writerow(hdr + ["Svaz"] if add_svaz else hdr)
+                        header = True
+                    for row in r:
+                        w.writerow(row + [svaz] if add_svaz else row)
+                        rows += 1
+        os.replace(outp + ".tmp", outp)
+        out[outp] = len(parts)
+        print(f"{target}: {len(parts)} svazů, {rows} řádků -> {outp}")
+    if os.path.exists(SVAZY_FILE):
+        have = {svaz for parts in groups.values() for svaz, _ in parts}
+        missing = [s for s in load_svazy() if s not in have]
+        if missing:
+            print(f"bez výstupu ({len(missing)}): {', '.join(missing)}")
+    return out
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "discover":
+        print(" ".join(all_svazy(refresh=True)))
+    elif cmd == "shard":
+        print(",".join(shard(all_svazy())))
+    elif cmd == "merge":
+        merge(sys.argv[2] if len(sys.argv) > 2 else os.getenv("ROCNIK", "2025"))
+    else:
+        raise SystemExit("použití: stis_svazy.py discover | shard | merge [ROCNIK]")